@@ -1,94 +1,509 @@
 import sqlite3
 import os
 import datetime
-import json
-import ast
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple
 
-def str_to_dict(s: str) -> dict:
-    """
-    将字符串转换为字典，兼容多种常见格式
-
-    参数:
-        s: 待转换的字符串（支持 JSON 格式/原生 dict 格式字符串）
+import numpy as np
 
-    返回:
-        dict: 转换后的字典
+from app_config import GraderConfig, get_config
 
-    异常:
-        ValueError: 字符串格式无法解析为字典时抛出
+def get_date() -> str:
+    """
+    :return: 今天的日期，如 "2025-12-13"（分数库按这个格式存日期，字符串顺序即日期顺序）
     """
-    if not isinstance(s, str):
-        raise TypeError("输入必须是字符串类型")
+    return datetime.date.today().isoformat()
 
-    # 去除首尾空白字符（包括换行、制表符等）
-    s_stripped = s.strip()
 
-    # 空字符串直接返回空字典
-    if not s_stripped:
-        return {}
+class Partition(NamedTuple):
+    """一次读写落到的位置：日期对应的数据库文件、表，以及汇总表中的周/月键"""
+    date: str  # "YYYY-MM-DD"
+    db_file: str
+    table: str
+    week: str  # 当周周一 "YYYY-MM-DD"
+    month: str  # "YYYY-MM"
 
+
+@lru_cache(maxsize=1024)
+def _partition(date: str) -> Partition:
     try:
-        # 优先用 ast.literal_eval（支持 Python 原生 dict 格式，如单引号、True/False/None）
-        result = ast.literal_eval(s_stripped)
-        if isinstance(result, dict):
-            return result
-        else:
-            raise ValueError("解析结果不是字典类型")
-    except (SyntaxError, ValueError):
-        # 降级用 json.loads（仅支持 JSON 标准格式：双引号、true/false/null）
-        try:
-            # 替换 Python 关键字为 JSON 关键字
-            s_json = s_stripped.replace("'", '"') \
-                .replace("True", "true") \
-                .replace("False", "false") \
-                .replace("None", "null")
-            result = json.loads(s_json)
-            if isinstance(result, dict):
-                return result
-            else:
-                raise ValueError("解析结果不是字典类型")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"无法将字符串解析为字典：{e}") from e
-def get_time():
-    #date to dict{"year":2025,"month": 12, "day": 13, "hour": "15", ...}
-    time = datetime.datetime.now().strftime('{"y":"%Y", "m":"%m", "d":"%d", "h":"%H", "M":"%M", "s":"%S"}')
-    return str_to_dict(time)
+        d = datetime.date.fromisoformat(date)
+    except ValueError:
+        raise ValueError(f"日期格式应为 YYYY-MM-DD：{date}") from None
+    return Partition(d.isoformat(), SCORE_DB_FILE, "scores",
+                     (d - datetime.timedelta(days=d.weekday())).isoformat(), d.isoformat()[:7])
+
+
+def resolve_partition(date=None) -> Partition:
+    """
+    把日期解析为它的分数分区；每个操作开始时调用一次，之后都用返回的结果，
+    跨过午夜的保存也只会写到同一天。相同日期的解析结果会被缓存
+    :param date: "YYYY-MM-DD"、datetime.date 或 datetime.datetime（只取日期），默认今天（可以传过去的日期来修改历史分数）
+    :return: Partition
+    """
+    if date is None:
+        date = get_date()
+    elif isinstance(date, datetime.datetime):
+        date = date.date().isoformat()
+    elif isinstance(date, datetime.date):
+        date = date.isoformat()
+    return _partition(str(date).strip())
 def create_folders(name:str):
     if not os.path.exists(name):
         os.makedirs(name)
 
+#########################PRAGMA 性能配置####################
+# 连接打开时按配置执行的 PRAGMA；cache_size 为负数时单位是 KiB
+# 每个配置都给出 PRAGMA_KEYS 中的全部项，切换配置时不会留下上一个配置的设置
+PRAGMA_KEYS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")
+PRAGMA_PROFILES: dict[str, dict[str, object]] = {
+    # SQLite 自带默认值（回滚日志 + FULL 同步）
+    "default": {"journal_mode": "DELETE", "synchronous": "FULL", "cache_size": -2000, "mmap_size": 0,
+                "temp_store": "DEFAULT"},
+    # WAL 让读（如教师报表）和写（打分员保存）互不阻塞，FULL 同步保证每次提交都落盘
+    "durable": {"journal_mode": "WAL", "synchronous": "FULL", "cache_size": -8192, "mmap_size": 0,
+                "temp_store": "MEMORY"},
+    # WAL + NORMAL 同步：断电可能丢最后几次提交，但不会损坏数据库
+    "fast": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -16384,
+             "mmap_size": 64 * 1024 * 1024, "temp_store": "MEMORY"},
+    # 批量导入：不等待落盘，导入中断需要重新导入
+    "bulk-import": {"journal_mode": "WAL", "synchronous": "OFF", "cache_size": -65536,
+                    "mmap_size": 256 * 1024 * 1024, "temp_store": "MEMORY"},
+    # 旧的 Leaf 月数据库（归档）：保持回滚日志，不在旁边留下 -wal/-shm；只在一次性改写时使用
+    "archive": {"journal_mode": "DELETE", "synchronous": "OFF", "cache_size": -65536, "mmap_size": 0,
+                "temp_store": "MEMORY"},
+}
+assert all(set(pragmas) == set(PRAGMA_KEYS) for pragmas in PRAGMA_PROFILES.values())
+_default_profile = "durable"
+_db_profiles: dict[str, str] = {}  # {数据库绝对路径: 配置名}
+
+
+def set_default_profile(profile: str) -> None:
+    """
+    设置全局默认的 PRAGMA 配置（没有单独指定配置的数据库都使用它）
+    :param profile: PRAGMA_PROFILES 中的配置名
+    """
+    global _default_profile
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的PRAGMA配置：{profile}")
+    _default_profile = profile
+
+
+def set_profile(db_file: str, profile: str | None) -> None:
+    """
+    为某个数据库文件单独指定 PRAGMA 配置，已打开的连接在下次使用时切换
+    :param db_file: 数据库文件路径
+    :param profile: PRAGMA_PROFILES 中的配置名，None 表示恢复使用全局默认
+    """
+    if profile is not None and profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的PRAGMA配置：{profile}")
+    if profile is None:
+        _db_profiles.pop(os.path.abspath(db_file), None)
+    else:
+        _db_profiles[os.path.abspath(db_file)] = profile
+
+
+def get_profile(db_file: str) -> str:
+    return _db_profiles.get(os.path.abspath(db_file), _default_profile)
+
+
+def _apply_profile(conn: sqlite3.Connection, profile: str) -> None:
+    pragmas = PRAGMA_PROFILES[profile]
+    for pragma in PRAGMA_KEYS:
+        conn.execute(f"PRAGMA {pragma}={pragmas[pragma]}")
+    conn.profile = profile
+
+#########################列类型####################
+# STRICT 表需要 SQLite 3.37+，更老的版本自动退化为普通表
+STRICT_SUPPORTED = sqlite3.sqlite_version_info >= (3, 37, 0)
+# 已知表的列类型：{(数据库绝对路径, 表名): {列名: 声明类型}}
+_column_types_cache: dict[tuple[str, str], dict[str, str]] = {}
+
+
+def _to_integer(value):
+    if value is None or isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"不是整数：{value!r}")
+    return int(number)
+
+
+def _to_real(value):
+    return None if value is None else float(value)
+
+
+def _to_text(value):
+    return None if value is None else str(value)
+
+
+def _converter(declared_type: str):
+    """根据列的声明类型返回插入前的转换函数（未知类型原样保留）"""
+    declared_type = declared_type.upper()
+    if "INT" in declared_type:
+        return _to_integer
+    if declared_type in ("REAL", "FLOAT", "DOUBLE"):
+        return _to_real
+    if declared_type == "TEXT":
+        return _to_text
+    return lambda value: value
+
+
+def forget_column_types(db_file: str, table_name: str = None) -> None:
+    """表结构变化后丢弃缓存的列类型，默认丢弃该数据库的全部缓存"""
+    path = os.path.abspath(db_file)
+    for key in [k for k in _column_types_cache if k[0] == path and (table_name is None or k[1] == table_name)]:
+        _column_types_cache.pop(key)
+
+#########################输出与查询计时####################
+_quiet = False
+
+
+def set_quiet(quiet: bool = True) -> None:
+    """安静模式：不再打印 <$> 开头的成功提示（失败信息仍会打印），适合保存等高频路径"""
+    global _quiet
+    _quiet = quiet
+
+
+def _echo(message: str) -> None:
+    if not _quiet:
+        print(message)
+
+
+class QueryEvent(NamedTuple):
+    """一条语句的执行记录"""
+    db_file: str
+    table: str
+    operation: str
+    duration: float  # 秒
+    rows: int  # 影响/返回的行数
+    committed: bool  # 是否已提交（在 transaction() 作用域内为 False）
+    error: str | None = None
+
+
+QUERY_HOOKS: list = []  # 每条语句执行后依次调用 hook(QueryEvent)
+
+
+def add_query_hook(hook) -> None:
+    if hook not in QUERY_HOOKS:
+        QUERY_HOOKS.append(hook)
+
+
+def remove_query_hook(hook) -> None:
+    if hook in QUERY_HOOKS:
+        QUERY_HOOKS.remove(hook)
+
+
+def _dispatch_query_event(event: QueryEvent) -> None:
+    """依次调用查询钩子；钩子出错只打印，不影响语句本身"""
+    for hook in list(QUERY_HOOKS):
+        try:
+            hook(event)
+        except Exception as e:
+            print(f"<$> 查询钩子出错：{e}")
+
+
+class QueryHistogram:
+    """进程内的耗时直方图，按操作类型统计"""
+    BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, event: QueryEvent) -> None:
+        ms = event.duration * 1000
+        with self._lock:
+            stat = self._stats.setdefault(event.operation,
+                                          {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                           "buckets": [0] * len(self.BUCKETS_MS)})
+            stat["count"] += 1
+            stat["total_ms"] += ms
+            stat["max_ms"] = max(stat["max_ms"], ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    stat["buckets"][i] += 1
+                    break
+
+    def snapshot(self) -> dict[str, dict]:
+        """:return: {操作: {"count", "total_ms", "max_ms", "buckets"}} 的副本"""
+        with self._lock:
+            return {op: dict(stat, buckets=list(stat["buckets"])) for op, stat in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> str:
+        labels = [f"<={b}ms" if b != float("inf") else f">{self.BUCKETS_MS[-2]}ms" for b in self.BUCKETS_MS]
+        lines = []
+        for op, stat in sorted(self.snapshot().items()):
+            buckets = " ".join(f"{label}:{n}" for label, n in zip(labels, stat["buckets"]) if n)
+            lines.append(f"{op}: {stat['count']} 次，平均 {stat['total_ms'] / stat['count']:.2f}ms，"
+                         f"最长 {stat['max_ms']:.2f}ms（{buckets}）")
+        return "\n".join(lines)
+
+
+query_histogram = QueryHistogram()
+add_query_hook(query_histogram.record)
+
+
+class SlowQueryLog:
+    """把超过阈值的语句追加写入日志文件"""
+
+    def __init__(self, path: str, threshold_ms: float = 100):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+
+    def __call__(self, event: QueryEvent) -> None:
+        ms = event.duration * 1000
+        if ms < self.threshold_ms:
+            return
+        line = (f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S}\t{ms:.1f}ms\t{event.operation}\t{event.db_file}\t"
+                f"{event.table}\trows={event.rows}\tcommitted={event.committed}"
+                + (f"\terror={event.error}" if event.error else "") + "\n")
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _sql_operation(sql: str) -> str:
+    """
+    :return: 语句的第一个关键字（小写），如 "select"、"insert"，作为计时记录的操作名
+    """
+    words = sql.split(None, 1)
+    return words[0].lower() if words else "execute"
+
+
+def enable_slow_query_log(path: str = "slow_queries.log", threshold_ms: float = 100) -> SlowQueryLog:
+    """
+    开启慢查询日志
+    :param path: 日志文件路径
+    :param threshold_ms: 阈值（毫秒），耗时不低于它的语句会被记录
+    :return: 日志钩子（传给 remove_query_hook 可关闭）
+    """
+    hook = SlowQueryLog(path, threshold_ms)
+    add_query_hook(hook)
+    return hook
+
+#########################SQL语句缓存####################
+# sqlite3 内部按语句文本缓存编译结果；文本必须逐字节相同才能命中，所以同一种语句只拼一次
+SQLITE_CACHED_STATEMENTS = 256  # 每个连接缓存的已编译语句数（修改后对新打开的连接生效）
+
+
+@lru_cache(maxsize=512)
+def build_sql(operation: str, table_name: str, columns: tuple = (), where: tuple = (), limit: bool = False) -> str:
+    """
+    拼出（并缓存）增删改查的语句模板，键为 (操作, 表名, 列名元组, 条件列元组)
+    :param operation: "insert" / "select" / "update" / "delete"
+    :param table_name: 表名
+    :param columns: insert/update 的列，select 要取的列（空元组表示 *）
+    :param where: 条件列，按 `列`=? 用 AND 连接
+    :param limit: select 是否带 LIMIT ?
+    :return: SQL 语句
+    """
+    where_clause = " AND ".join([f"`{k}`=?" for k in where])
+    if operation == "insert":
+        placeholders = ",".join(["?"] * len(columns))
+        return f"INSERT INTO `{table_name}` ({','.join([f'`{k}`' for k in columns])}) VALUES ({placeholders})"
+    if operation == "select":
+        select = ", ".join([f"`{c}`" for c in columns]) if columns else "*"
+        sql = f"SELECT {select} FROM `{table_name}`"
+        if where:
+            sql += f" WHERE {where_clause}"
+        if limit:
+            sql += " LIMIT ?"
+        return sql
+    if operation == "update":
+        set_clause = ",".join([f"`{k}`=?" for k in columns])
+        return f"UPDATE `{table_name}` SET {set_clause} WHERE {where_clause}"
+    if operation == "delete":
+        return f"DELETE FROM `{table_name}` WHERE {where_clause}"
+    raise ValueError(f"未知的操作：{operation}")
+
+#########################连接池####################
+# 每个数据库文件、每个线程一个长连接：{(数据库绝对路径, 线程id): [连接, 最后使用时间]}
+CONNECTION_IDLE_TIMEOUT = 300  # 秒，空闲超过这个时间的连接会被关闭
+_connections: dict[tuple[str, int], list] = {}
+_connections_lock = threading.Lock()
+_reaper_started = False
+
+
+class _PooledConnection(sqlite3.Connection):
+    """连接池中的连接，额外记录 MyEasySQLite.transaction() 的嵌套层数、已应用的 PRAGMA 配置和还没读完的流式查询数"""
+    transaction_depth = 0
+    profile = None
+    open_readers = 0
+
+
+def _reap_idle_connections():
+    """后台线程：定期关闭空闲连接"""
+    while True:
+        time.sleep(max(CONNECTION_IDLE_TIMEOUT / 2, 1))
+        close_idle_connections()
+
+
+def acquire_connection(db_file: str) -> sqlite3.Connection:
+    """
+    从连接池取得当前线程对该数据库文件的长连接，没有则新建
+    :param db_file: 数据库文件路径
+    :return: sqlite3.Connection（row_factory 为 sqlite3.Row）
+    """
+    global _reaper_started
+    key = (os.path.abspath(db_file), threading.get_ident())
+    with _connections_lock:
+        entry = _connections.get(key)
+        if entry is None:
+            # 连接只在创建它的线程中使用；关闭可能发生在清理线程，所以关掉同线程检查
+            conn = sqlite3.connect(db_file, check_same_thread=False, factory=_PooledConnection,
+                                   cached_statements=SQLITE_CACHED_STATEMENTS)
+            conn.row_factory = sqlite3.Row
+            _apply_profile(conn, get_profile(db_file))
+            entry = [conn, 0.0]
+            _connections[key] = entry
+            if not _reaper_started:
+                threading.Thread(target=_reap_idle_connections, name="sqlite-reaper", daemon=True).start()
+                _reaper_started = True
+        conn = entry[0]
+        profile = get_profile(db_file)
+        if conn.profile != profile and not conn.in_transaction:
+            _apply_profile(conn, profile)
+        entry[1] = time.monotonic()
+        return conn
+
+
+def close_idle_connections(max_idle: float = None) -> int:
+    """
+    关闭空闲超时的连接
+    :param max_idle: 空闲秒数阈值，默认 CONNECTION_IDLE_TIMEOUT
+    :return: 关闭的连接数
+    """
+    max_idle = CONNECTION_IDLE_TIMEOUT if max_idle is None else max_idle
+    now = time.monotonic()
+    with _connections_lock:
+        idle = [key for key, (conn, last_used) in _connections.items()
+                if now - last_used >= max_idle and not conn.in_transaction and not conn.open_readers]
+        for key in idle:
+            _connections.pop(key)[0].close()
+    return len(idle)
+
+
+def release_connection(db_file: str) -> bool:
+    """
+    关闭当前线程对该数据库文件的连接（事务进行中、或还有流式查询没读完时保留）
+    :param db_file: 数据库文件路径
+    :return: 是否关闭了连接
+    """
+    key = (os.path.abspath(db_file), threading.get_ident())
+    with _connections_lock:
+        entry = _connections.get(key)
+        if entry is None or entry[0].in_transaction or entry[0].transaction_depth or entry[0].open_readers:
+            return False
+        _connections.pop(key)[0].close()
+        return True
+
+
+def close_connections(db_file: str = None) -> None:
+    """
+    关闭连接池中的连接（例如要移动或重写数据库文件之前）
+    :param db_file: 只关闭这个数据库文件的连接，默认全部关闭
+    """
+    path = os.path.abspath(db_file) if db_file else None
+    with _connections_lock:
+        for key in [k for k in _connections if path is None or k[0] == path]:
+            _connections.pop(key)[0].close()
+
+
+atexit.register(close_connections)
+
 class MyEasySQLite:
 
 
     """自定义的超级简单的SQLite"""
 
-    def __init__(self, db_file: str = "校园卫生管理.db"):
+    def __init__(self, db_file: str = "校园卫生管理.db", profile: str = None):
+        """
+        :param db_file: 数据库文件路径
+        :param profile: 该数据库使用的 PRAGMA 配置（"durable"/"fast"/"bulk-import"...），默认使用全局配置
+        """
         self.db_file = db_file
         self.conn = None
         self.cursor = None
+        if profile is not None:
+            set_profile(db_file, profile)
 
     def _get_cursor(self):
-        """内部自动维护连接，用户完全不用管"""
-        try:
-            if self.conn:
-                self.conn.execute("SELECT 1")
-            else:
-                raise sqlite3.ProgrammingError
-        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
+        """内部自动维护连接，用户完全不用管（连接来自连接池，同一文件同一线程共用一个长连接）"""
+        self.conn = acquire_connection(self.db_file)
         self.cursor = self.conn.cursor()
         return self.cursor
 
     def close(self):
-        """自动关闭连接，用with语句可省略"""
-        if self.conn:
-            try:
-                self.conn.close()
-            finally:
-                self.conn = None
-                self.cursor = None
-                pass
+        """
+        关闭当前线程对这个数据库文件的连接，用with语句可省略
+        事务进行中时连接保留；同一文件的其他实例下次使用时会自动重新打开连接
+        """
+        if self.conn is not None:
+            release_connection(self.db_file)
+        self.conn = None
+        self.cursor = None
+    def _commit(self) -> bool:
+        """提交；在 transaction() 作用域内时推迟到作用域结束
+        :return: 是否真正提交了"""
+        if not self.conn.transaction_depth:
+            self.conn.commit()
+            return True
+        return False
+
+    def _record(self, table_name: str, operation: str, started: float, rows: int, committed: bool,
+                error: Exception = None):
+        """把一条语句的耗时交给查询钩子"""
+        if not QUERY_HOOKS:
+            return
+        _dispatch_query_event(QueryEvent(self.db_file, table_name, operation, time.perf_counter() - started, rows,
+                                         committed, str(error) if error is not None else None))
+
+    def _rollback(self, e: Exception):
+        """回滚；在 transaction() 作用域内时把异常继续抛出，由作用域回滚整个事务"""
+        if self.conn.transaction_depth:
+            raise e
+        self.conn.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """
+        事务/批处理作用域：with db.transaction(): ...
+        作用域内的增删改不会立即提交，作用域结束时一次提交；出错时全部回滚并继续抛出异常
+        可以嵌套，内层用 SAVEPOINT 实现，内层出错只回滚内层
+        """
+        conn = self._get_cursor().connection
+        depth = conn.transaction_depth
+        savepoint = f"`sp_{depth}`"
+        conn.execute("BEGIN" if depth == 0 else f"SAVEPOINT {savepoint}")
+        conn.transaction_depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            conn.transaction_depth = depth
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            conn.transaction_depth = depth
+            if depth == 0:
+                started = time.perf_counter()
+                conn.commit()
+                self._record("", "commit", started, 0, True)
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+
     def __enter__(self):
         return self
 
@@ -96,26 +511,87 @@ class MyEasySQLite:
         self.close()
 
     # ===================== 创建表（仅需传列名列表） =====================
-    def create_table(self, table_name: str, column_names: list):
+    def create_table(self, table_name: str, column_names: list, indexes: list = None, unique: list = None,
+                     strict: bool = False):
         """
         创建表（极简版）
         :param table_name: 表名（如"卫生检查表"）
-        :param column_names: 列名列表（如["编号", "学生姓名", "班级"]）
+        :param column_names: 列名列表（如["编号", "学生姓名", "班级"]），
+                             也可以用 (列名, 类型) 声明类型，类型为 "INTEGER"/"REAL"/"TEXT"（如[("分数", "REAL")]）
+        :param indexes: 要建立的普通索引，每个是一组列名（如[["班级", "日期"]]），可选
+        :param unique: 要求唯一的列组合（如[["学生姓名"]]），用唯一索引实现，对已存在的表同样生效，可选
+        :param strict: 是否创建 STRICT 表（类型不符的数据直接报错，需要 SQLite 3.37+）
         """
-        # 内部自动处理：所有列默认文本类型、非必填
-        sql_columns = [f"`{col}` TEXT" for col in column_names]
+        # 内部自动处理：没有声明类型的列默认文本类型、非必填
+        sql_columns = []
+        for col in column_names:
+            name, col_type = (col, "TEXT") if isinstance(col, str) else col
+            if col_type.upper() not in ("INTEGER", "REAL", "TEXT"):
+                raise ValueError(f"不支持的列类型：{col_type}")
+            sql_columns.append(f"`{name}` {col_type.upper()}")
         # 自动添加一个隐藏的自增编号（避免用户手动管编号）
         sql_columns.insert(0, "`_id` INTEGER PRIMARY KEY AUTOINCREMENT")
 
         sql = f"CREATE TABLE IF NOT EXISTS `{table_name}` ({', '.join(sql_columns)})"
+        if strict and STRICT_SUPPORTED:
+            sql += " STRICT"
+        forget_column_types(self.db_file, table_name)
         cursor = self._get_cursor()
+        started = time.perf_counter()
         try:
             cursor.execute(sql)
-            self.conn.commit()
-            print(f"<$> 表「{table_name}」创建成功（列：{column_names}）")
+            self._record(table_name, "create_table", started, 0, self._commit())
+            _echo(f"<$> 表「{table_name}」创建成功（列：{column_names}）")
         except Exception as e:
-            self.conn.rollback()
+            self._record(table_name, "create_table", started, 0, False, e)
+            self._rollback(e)
             print(f"<$> 创建表失败：{e}")
+            return
+        for columns in indexes or []:
+            self.create_index(table_name, columns)
+        for columns in unique or []:
+            self.create_index(table_name, columns, unique=True)
+
+    def _column_types(self, table_name: str) -> dict[str, str]:
+        """读取（并缓存）表的列声明类型 {列名: 类型}"""
+        key = (os.path.abspath(self.db_file), table_name)
+        types = _column_types_cache.get(key)
+        if types is None:
+            rows = self.conn.execute(f"PRAGMA table_info(`{table_name}`)").fetchall()
+            types = {row["name"]: (row["type"] or "") for row in rows}
+            if types:
+                _column_types_cache[key] = types
+        return types
+
+    def _converters(self, table_name: str, keys: list) -> list:
+        """按列的声明类型为每个列名返回插入前的转换函数"""
+        types = self._column_types(table_name)
+        return [_converter(types.get(k, "")) for k in keys]
+
+    # ===================== 创建索引 =====================
+    def create_index(self, table_name: str, columns: list, unique: bool = False, name: str = None) -> bool:
+        """
+        创建索引，已存在时什么都不做，可以重复调用
+        :param table_name: 表名
+        :param columns: 索引的列名列表（如["班级", "日期"]）
+        :param unique: 是否唯一索引
+        :param name: 索引名，默认 idx_/uq_ + 表名 + 列名
+        :return: 是否成功
+        """
+        name = name or f"{'uq' if unique else 'idx'}_{table_name}_{'_'.join(columns)}"
+        sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS `{name}` "
+               f"ON `{table_name}` ({', '.join([f'`{c}`' for c in columns])})")
+        cursor = self._get_cursor()
+        started = time.perf_counter()
+        try:
+            cursor.execute(sql)
+            self._record(table_name, "create_index", started, 0, self._commit())
+            return True
+        except Exception as e:
+            self._record(table_name, "create_index", started, 0, False, e)
+            self._rollback(e)
+            print(f"<$> 创建索引失败：{e}")
+            return False
 
     # ===================== 添加数据（仅需传{列名:值}） =====================
     def add_data(self, table_name: str, data: dict):
@@ -130,21 +606,50 @@ class MyEasySQLite:
             return None
 
         keys = list(data.keys())
-        values = list(data.values())
-        placeholders = ",".join(["?"] * len(keys))
-
-        sql = f"INSERT INTO `{table_name}` ({','.join([f'`{k}`' for k in keys])}) VALUES ({placeholders})"
+        sql = build_sql("insert", table_name, tuple(keys))
         cursor = self._get_cursor()
+        started = time.perf_counter()
         try:
+            # 按列的声明类型转换（如 "98" → 98.0），TEXT 列与原来一样存字符串
+            values = [convert(data[k]) for convert, k in zip(self._converters(table_name, keys), keys)]
             cursor.execute(sql, values)
-            self.conn.commit()
-            print(f"<$> 数据添加成功，ID：{cursor.lastrowid}")
+            self._record(table_name, "insert", started, cursor.rowcount, self._commit())
+            _echo(f"<$> 数据添加成功，ID：{cursor.lastrowid}")
             return cursor.lastrowid
         except Exception as e:
-            self.conn.rollback()
+            self._record(table_name, "insert", started, 0, False, e)
+            self._rollback(e)
             print(f"<$> 添加数据失败：{e}")
             return None
 
+    # ===================== 批量添加数据 =====================
+    def add_many(self, table_name: str, rows: list[dict]) -> int:
+        """
+        批量添加数据：一条预编译的 INSERT 用 executemany 执行，整批一个事务、一次提交
+        :param table_name: 表名
+        :param rows: 数据字典列表，每行的列名必须相同（如[{"班级":"601", "分数":"9"}, ...]）
+        :return: 添加的行数，失败返回 0
+        """
+        if not rows:
+            print("<$> 数据不能为空")
+            return 0
+
+        keys = list(rows[0].keys())
+        sql = build_sql("insert", table_name, tuple(keys))
+        cursor = self._get_cursor()
+        started = time.perf_counter()
+        try:
+            converters = self._converters(table_name, keys)
+            cursor.executemany(sql, [[convert(row[k]) for convert, k in zip(converters, keys)] for row in rows])
+            self._record(table_name, "insert_many", started, cursor.rowcount, self._commit())
+            _echo(f"<$> 成功添加 {cursor.rowcount} 条数据")
+            return cursor.rowcount
+        except Exception as e:
+            self._record(table_name, "insert_many", started, 0, False, e)
+            self._rollback(e)
+            print(f"<$> 批量添加数据失败：{e}")
+            return 0
+
     # ===================== 查询数据（可选条件） =====================
     def get_data(self, table_name: str, conditions: dict = None):
         """
@@ -154,13 +659,13 @@ class MyEasySQLite:
         :return: 结果列表（每个元素是字典，直接用列名取值）
         """
         cursor = self._get_cursor()
+        started = time.perf_counter()
         try:
             if conditions:
-                where_clause = " AND ".join([f"`{k}`=?" for k in conditions.keys()])
-                sql = f"SELECT * FROM `{table_name}` WHERE {where_clause}"
+                sql = build_sql("select", table_name, where=tuple(conditions.keys()))
                 cursor.execute(sql, list(conditions.values()))
             else:
-                sql = f"SELECT * FROM `{table_name}`"
+                sql = build_sql("select", table_name)
                 cursor.execute(sql)
 
             # 转成极简字典列表，用户直接用
@@ -173,12 +678,62 @@ class MyEasySQLite:
                         row_dict[col] = row[col]
                 results.append(row_dict)
 
-            print(f"<$> 查询到 {len(results)} 条数据")
+            self._record(table_name, "select", started, len(results), False)
+            _echo(f"<$> 查询到 {len(results)} 条数据")
             return results
         except Exception as e:
+            self._record(table_name, "select", started, 0, False, e)
             print(f"<$> 查询数据失败：{e}")
             return []
 
+    # ===================== 流式查询（指定列） =====================
+    def iter_data(self, table_name: str, columns: list = None, conditions: dict = None, limit: int = None,
+                  as_dict: bool = False, batch_size: int = 256):
+        """
+        流式查询：只取需要的列，用 fetchmany 分批读取，内存占用与表的大小无关
+        :param table_name: 表名
+        :param columns: 要查询的列名列表（如["class", "score"]），默认全部列（含 _id）
+        :param conditions: 查询条件（可选，如{"班级":"三年级二班"}）
+        :param limit: 最多返回的行数（可选）
+        :param as_dict: True 时每行是 {列名: 值} 字典，默认是元组（按 columns 的顺序）
+        :param batch_size: 每次 fetchmany 读取的行数
+        :return: 生成器，逐行产出结果
+        """
+        sql = build_sql("select", table_name, tuple(columns or ()), tuple(conditions or ()), limit is not None)
+        params = list(conditions.values()) if conditions else []
+        if limit is not None:
+            params.append(int(limit))
+
+        cursor = self._get_cursor()
+        conn = self.conn
+        if as_dict:
+            cursor.row_factory = lambda cur, row: {d[0]: v for d, v in zip(cur.description, row)}
+        else:
+            cursor.row_factory = None
+        # 读完（或生成器被关闭）之前，空闲清理和 close() 都不会关闭这个连接，调用方处理得再慢也不会中断
+        conn.open_readers += 1
+        started = time.perf_counter()
+        try:
+            cursor.execute(sql, params)
+        except Exception as e:
+            conn.open_readers -= 1
+            self._record(table_name, "select_iter", started, 0, False, e)
+            print(f"<$> 查询数据失败：{e}")
+            return
+        count = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        finally:
+            cursor.close()
+            conn.open_readers -= 1
+            # 计时包含调用方逐行处理的时间
+            self._record(table_name, "select_iter", started, count, False)
+
     # ===================== 修改数据 =====================
     def update_data(self, table_name: str, new_data: dict, conditions: dict):
         """
@@ -195,19 +750,21 @@ class MyEasySQLite:
             print("<$> 修改条件不能为空（防止改所有数据）")
             return 0
 
-        set_clause = ",".join([f"`{k}`=?" for k in new_data.keys()])
-        where_clause = " AND ".join([f"`{k}`=?" for k in conditions.keys()])
-        sql = f"UPDATE `{table_name}` SET {set_clause} WHERE {where_clause}"
+        sql = build_sql("update", table_name, tuple(new_data.keys()), tuple(conditions.keys()))
 
-        params = list(new_data.values()) + list(conditions.values())
         cursor = self._get_cursor()
+        started = time.perf_counter()
         try:
+            keys = list(new_data.keys())
+            params = [convert(new_data[k]) for convert, k in zip(self._converters(table_name, keys), keys)]
+            params += list(conditions.values())
             cursor.execute(sql, params)
-            self.conn.commit()
-            print(f"<$> 成功修改 {cursor.rowcount} 条数据")
+            self._record(table_name, "update", started, cursor.rowcount, self._commit())
+            _echo(f"<$> 成功修改 {cursor.rowcount} 条数据")
             return cursor.rowcount
         except Exception as e:
-            self.conn.rollback()
+            self._record(table_name, "update", started, 0, False, e)
+            self._rollback(e)
             print(f"<$> 修改数据失败：{e}")
             return 0
 
@@ -219,105 +776,856 @@ class MyEasySQLite:
         :param conditions: 删除条件（如{"学生姓名":"张三"}）
         :return: 删除的行数
         """
-
-        where_clause = " AND ".join([f"`{k}`=?" for k in conditions.keys()])
-        sql = f"DELETE FROM `{table_name}` WHERE {where_clause}"
+        sql = build_sql("delete", table_name, where=tuple(conditions.keys()))
 
         cursor = self._get_cursor()
+        started = time.perf_counter()
         try:
             cursor.execute(sql, list(conditions.values()))
-            self.conn.commit()
-            print(f"<$> 成功删除 {cursor.rowcount} 条数据")
+            self._record(table_name, "delete", started, cursor.rowcount, self._commit())
+            _echo(f"<$> 成功删除 {cursor.rowcount} 条数据")
             return cursor.rowcount
         except Exception as e:
-            self.conn.rollback()
+            self._record(table_name, "delete", started, 0, False, e)
+            self._rollback(e)
             print(f"<$> 删除数据失败：{e}")
             return 0
 
+    # ===================== 执行自定义SQL =====================
+    def execute(self, sql: str, params=(), table_name: str = "") -> list:
+        """
+        执行极简接口覆盖不到的SQL（如建索引、upsert、聚合查询）
+        :param sql: SQL语句
+        :param params: 参数（元组或字典）
+        :param table_name: 语句操作的表，只用于查询计时（直方图、慢查询日志）
+        :return: 结果列表（sqlite3.Row，可直接用列名取值），非查询语句返回空列表
+        """
+        operation = _sql_operation(sql)
+        cursor = self._get_cursor()
+        started = time.perf_counter()
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            self._record(table_name, operation, started, len(rows) or max(cursor.rowcount, 0), self._commit())
+            return rows
+        except Exception as e:
+            self._record(table_name, operation, started, 0, False, e)
+            self._rollback(e)
+            print(f"<$> 执行SQL失败：{e}")
+            return []
+
+    def executemany(self, sql: str, seq_of_params, table_name: str = "") -> int:
+        """
+        同一条SQL对多组参数执行，整批在一个事务中提交，失败时整批回滚
+        :param sql: SQL语句
+        :param seq_of_params: 参数序列（可以是生成器）
+        :param table_name: 语句操作的表，只用于查询计时（直方图、慢查询日志）
+        :return: 影响的行数，失败返回 0
+        """
+        operation = f"{_sql_operation(sql)}_many"
+        cursor = self._get_cursor()
+        started = time.perf_counter()
+        try:
+            cursor.executemany(sql, seq_of_params)
+            self._record(table_name, operation, started, cursor.rowcount, self._commit())
+            return cursor.rowcount
+        except Exception as e:
+            self._record(table_name, operation, started, 0, False, e)
+            self._rollback(e)
+            print(f"<$> 批量执行SQL失败：{e}")
+            return 0
+
 #########################SQL####################
 
+#============================AccountStore=======================================
+ACCOUNT_DB_FILE = "data/accounts.db"
+
+
+class AccountStore:
+    def __init__(self, db_file: str = ACCOUNT_DB_FILE):
+        """
+        AccountStore 保存所有等级的账号，一张表 (level, enc_name, enc_password)
+        (level, enc_name) 上有唯一索引，登录和增删账号都是一次索引查找
+        :param db_file: 数据库文件路径
+        """
+        self.table = "accounts"
+        folder = os.path.dirname(db_file)
+        if folder:
+            create_folders(folder)
+        self.sql = MyEasySQLite(db_file)
+        self.sql.create_table(self.table, ["level", "enc_name", "enc_password"])
+        self.sql.create_index(self.table, ["level", "enc_name"], unique=True, name=f"idx_{self.table}_level_name")
+
+    def get_password(self, level: str, enc_name: str) -> str | None:
+        """
+        :return: 该账号的加密密码，账号不存在时返回 None
+        """
+        rows = self.sql.execute(f"SELECT `enc_password` FROM `{self.table}` WHERE `level`=? AND `enc_name`=?",
+                                (level, enc_name), table_name=self.table)
+        return rows[0]["enc_password"] if rows else None
+
+    def get_all(self, level: str) -> dict[str, str]:
+        """
+        :return: 该等级的所有账号 {加密姓名: 加密密码}
+        """
+        rows = self.sql.execute(f"SELECT `enc_name`, `enc_password` FROM `{self.table}` WHERE `level`=? "
+                                f"ORDER BY `_id`", (level,), table_name=self.table)
+        return {row["enc_name"]: row["enc_password"] for row in rows}
+
+    def count(self, level: str = None) -> int:
+        if level is None:
+            rows = self.sql.execute(f"SELECT COUNT(*) FROM `{self.table}`", table_name=self.table)
+        else:
+            rows = self.sql.execute(f"SELECT COUNT(*) FROM `{self.table}` WHERE `level`=?", (level,), table_name=self.table)
+        return rows[0][0] if rows else 0
+
+    def add(self, level: str, enc_name: str, enc_password: str) -> None:
+        """
+        添加账号，同名账号已存在时覆盖其密码
+        """
+        self.sql.execute(f"INSERT INTO `{self.table}` (`level`, `enc_name`, `enc_password`) VALUES (?, ?, ?) "
+                         f"ON CONFLICT(`level`, `enc_name`) DO UPDATE SET `enc_password`=excluded.`enc_password`",
+                         (level, enc_name, enc_password), table_name=self.table)
+
+    def add_many(self, level: str, accounts: list[tuple[str, str]]) -> int:
+        """
+        批量添加账号，整批一个事务，同名账号覆盖其密码
+        :param accounts: [(加密姓名, 加密密码), ...]
+        :return: 写入的行数
+        """
+        return self.sql.executemany(
+            f"INSERT INTO `{self.table}` (`level`, `enc_name`, `enc_password`) VALUES (?, ?, ?) "
+            f"ON CONFLICT(`level`, `enc_name`) DO UPDATE SET `enc_password`=excluded.`enc_password`",
+            ((level, enc_name, enc_password) for enc_name, enc_password in accounts), table_name=self.table)
+
+    def delete(self, level: str, enc_name: str) -> int:
+        """
+        :return: 删除的行数（0 表示账号不存在）
+        """
+        return self.sql.delete_data(self.table, {"level": level, "enc_name": enc_name})
+
+#============================Assignments================================
+class AssignmentStore:
+    def __init__(self, db_file: str = ACCOUNT_DB_FILE):
+        """
+        AssignmentStore 保存每个打分员管理的班级设置，一张表 (name, grade, type, m_number)，
+        和账号库在同一个数据库文件里；name 上有唯一索引，改一个打分员只写一行
+        :param db_file: 数据库文件路径
+        """
+        self.table = "grader_assignments"
+        folder = os.path.dirname(db_file)
+        if folder:
+            create_folders(folder)
+        self.sql = MyEasySQLite(db_file)
+        self.sql.create_table(self.table, [("name", "TEXT"), ("grade", "TEXT"), ("type", "TEXT"),
+                                           ("m_number", "INTEGER")], strict=True)
+        self.sql.create_index(self.table, ["name"], unique=True, name=f"idx_{self.table}_name")
+
+    def get(self, name: str) -> GraderConfig | None:
+        """
+        :return: 该打分员的班级设置，没有设置时返回 None
+        """
+        rows = self.sql.execute(f"SELECT `grade`, `type`, `m_number` FROM `{self.table}` WHERE `name`=?", (name,), table_name=self.table)
+        return GraderConfig(*rows[0]) if rows else None
+
+    def get_all(self) -> dict[str, GraderConfig]:
+        rows = self.sql.execute(f"SELECT `name`, `grade`, `type`, `m_number` FROM `{self.table}` ORDER BY `_id`", table_name=self.table)
+        return {row[0]: GraderConfig(*row[1:]) for row in rows}
+
+    def count(self) -> int:
+        rows = self.sql.execute(f"SELECT COUNT(*) FROM `{self.table}`", table_name=self.table)
+        return rows[0][0] if rows else 0
+
+    def set_many(self, settings: dict[str, dict]) -> int:
+        """
+        写入若干打分员的设置（已有的覆盖），整批一个事务
+        :param settings: {打分员: {"grade": ..., "type": ..., "m_number": ...}}
+        :return: 写入的行数
+        """
+        return self.sql.executemany(
+            f"INSERT INTO `{self.table}` (`name`, `grade`, `type`, `m_number`) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT(`name`) DO UPDATE SET `grade`=excluded.`grade`, `type`=excluded.`type`, "
+            f"`m_number`=excluded.`m_number`",
+            ((name, str(setting["grade"]).strip(), str(setting.get("type", "")), _to_integer(setting["m_number"]))
+             for name, setting in settings.items()), table_name=self.table)
+
+    def set(self, name: str, grade, m_type: str, m_number) -> None:
+        self.set_many({name: {"grade": grade, "type": m_type, "m_number": m_number}})
+
+    def delete(self, name: str) -> int:
+        """
+        :return: 删除的行数（0 表示没有设置）
+        """
+        return self.sql.delete_data(self.table, {"name": name})
+
+    def import_from_config(self) -> int:
+        """
+        从 config.json 导入打分员设置（已有的覆盖），没有打分员名字的旧格式条目会被跳过，
+        班级设置不完整的条目（如旧版对话框被关掉时保存的空班级数）打印提示后跳过，不影响其他打分员
+        :return: 导入的行数
+        """
+        try:
+            data = get_config().read()
+        except FileNotFoundError:
+            return 0
+        settings = {}
+        for name, entry in data.items():
+            if not isinstance(entry, dict):
+                continue
+            error = _check_grader_setting(entry)
+            if error:
+                print(f"<$> config.json 中 {name} 的班级设置已跳过：{error}")
+                continue
+            settings[name] = entry
+        imported = self.set_many(settings) if settings else 0
+        _echo(f"<$> 已从 config.json 导入 {imported} 个打分员的班级设置")
+        return imported
+
+    def export_to_config(self) -> int:
+        """
+        把所有打分员设置写回 config.json（整个文件被替换）
+        import_from_config 跳过的条目（设置不完整、旧格式）原样保留，不会因为导出而丢失
+        :return: 导出的打分员数
+        """
+        assignments = self.get_all()
+        try:
+            data = get_config().read()
+        except FileNotFoundError:
+            data = {}
+        kept = {name: entry for name, entry in data.items()
+                if name not in assignments and (not isinstance(entry, dict) or _check_grader_setting(entry))}
+        kept.update({name: {"grade": a.grade, "type": a.type, "m_number": a.m_number}
+                     for name, a in assignments.items()})
+        get_config().write(kept)
+        return len(assignments)
+
+
+def _check_grader_setting(entry: dict) -> str | None:
+    """
+    :param entry: {"grade": ..., "type": ..., "m_number": ...}
+    :return: 错误说明，设置完整时返回 None
+    """
+    if not str(entry.get("grade", "")).strip():
+        return "没有年级"
+    try:
+        m_number = _to_integer(entry.get("m_number"))
+    except (TypeError, ValueError):
+        m_number = None
+    if m_number is None or m_number <= 0:
+        return f"班级数必须是正整数：{entry.get('m_number')!r}"
+    return None
+
+
+_assignment_store: AssignmentStore | None = None
+_assignment_store_lock = threading.Lock()
+
+
+def get_assignment_store() -> AssignmentStore:
+    """
+    获取进程内共享的打分员设置库，第一次使用且为空时自动从 config.json 导入
+    :return: AssignmentStore
+    """
+    global _assignment_store
+    with _assignment_store_lock:
+        if _assignment_store is None:
+            store = AssignmentStore()
+            if store.count() == 0:
+                store.import_from_config()
+            _assignment_store = store
+        return _assignment_store
+
+
+def get_grader_setting(name: str) -> GraderConfig | None:
+    """
+    打分员的班级设置：先查打分员设置库，没有时再查 config.json（兼容还没导入的旧配置）
+    :param name: 打分员明文姓名
+    :return: GraderConfig，两处都没有设置时返回 None
+    """
+    grader = get_assignment_store().get(name)
+    if grader is None:
+        try:
+            grader = get_config().get_grader(name)
+        except FileNotFoundError:
+            return None
+    return grader
+
+#============================Scores=====================================
+SCORE_DB_FILE = "data/scores.db"
+# 分数库的列：日期为 "YYYY-MM-DD"，weekday 为这一周的第几个上学日（1~5）
+SCORE_COLUMNS = [("grader", "TEXT"), ("date", "TEXT"), ("grade", "TEXT"), ("class", "TEXT"),
+                 ("weekday", "INTEGER"), ("score", "REAL")]
+# 汇总表：{周期: (表名, 由分数行 r 的日期算出周期键的表达式)}，周的键是当周周一，月的键是 "YYYY-MM"
+SUMMARY_TABLES = {
+    "day": ("score_daily", "{r}.`date`"),
+    "week": ("score_weekly", "date({r}.`date`, '-6 days', 'weekday 1')"),
+    "month": ("score_monthly", "substr({r}.`date`, 1, 7)"),
+}
+SUMMARY_TABLE_COLUMNS = [("period", "TEXT"), ("grade", "TEXT"), ("class", "TEXT"), ("total", "REAL"), ("count", "INTEGER")]
+
+
+class ScoreStore:
+    def __init__(self, db_file: str = SCORE_DB_FILE):
+        """
+        ScoreStore 把所有打分员、所有日期的分数放在一张表里
+        (grader, date, class, weekday) 上有唯一索引（同时覆盖按 (grader, date) 的查找），
+        (date, class) 上有普通索引，跨天、跨打分员、跨月的统计都是一次索引查询
+        :param db_file: 数据库文件路径
+        """
+        self.table = "scores"
+        folder = os.path.dirname(db_file)
+        if folder:
+            create_folders(folder)
+        self.sql = MyEasySQLite(db_file)
+        self.sql.create_table(self.table, SCORE_COLUMNS, strict=True)
+        self.sql.create_index(self.table, ["grader", "date", "class", "weekday"], unique=True,
+                              name=f"idx_{self.table}_grader_date_slot")
+        self.sql.create_index(self.table, ["date", "class"], name=f"idx_{self.table}_date_class")
+        self._create_summaries()
+        # 已导入的旧 Leaf 月数据库（"<打分员>/<YYYY-MM>.db"）和分数库自身的状态
+        self.sql.create_table("leaf_imports", [("source", "TEXT"), ("rows", "INTEGER")], strict=True)
+        self.sql.create_index("leaf_imports", ["source"], unique=True, name="idx_leaf_imports_source")
+        self.sql.create_table("store_meta", [("key", "TEXT"), ("value", "TEXT")], strict=True)
+        self.sql.create_index("store_meta", ["key"], unique=True, name="idx_store_meta_key")
+
+    def get_meta(self, key: str) -> str | None:
+        rows = self.sql.execute("SELECT `value` FROM `store_meta` WHERE `key`=?", (key,), table_name="store_meta")
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.sql.execute("INSERT INTO `store_meta` (`key`, `value`) VALUES (?, ?) "
+                         "ON CONFLICT(`key`) DO UPDATE SET `value`=excluded.`value`", (key, value), table_name="store_meta")
+
+    def imported_sources(self) -> set[str]:
+        """
+        :return: 已经导入过的旧 Leaf 月数据库 {"<打分员>/<YYYY-MM>.db", ...}
+        """
+        return {row[0] for row in self.sql.execute("SELECT `source` FROM `leaf_imports`", table_name="leaf_imports")}
+
+    def mark_imported(self, source: str, rows: int) -> None:
+        self.sql.execute("INSERT INTO `leaf_imports` (`source`, `rows`) VALUES (?, ?) "
+                         "ON CONFLICT(`source`) DO UPDATE SET `rows`=excluded.`rows`", (source, rows), table_name="leaf_imports")
+
+    def _create_summaries(self) -> None:
+        """
+        建立每日/每周/每月的各班汇总表（总分、有分数的格数），
+        并用触发器让 scores 的每次插入/修改/删除在同一事务里更新汇总，不管走哪条写入路径
+        """
+        on_insert, on_delete = [], []
+        for table, key in SUMMARY_TABLES.values():
+            self.sql.create_table(table, SUMMARY_TABLE_COLUMNS, strict=True)
+            self.sql.create_index(table, ["period", "grade", "class"], unique=True, name=f"idx_{table}_slot")
+            new_key, old_key = key.format(r="NEW"), key.format(r="OLD")
+            on_insert.append(
+                f"INSERT INTO `{table}` (`period`, `grade`, `class`, `total`, `count`) "
+                f"VALUES ({new_key}, NEW.`grade`, NEW.`class`, COALESCE(NEW.`score`, 0), NEW.`score` IS NOT NULL) "
+                f"ON CONFLICT(`period`, `grade`, `class`) DO UPDATE SET "
+                f"`total`=`total`+excluded.`total`, `count`=`count`+excluded.`count`;")
+            where = f"`period`={old_key} AND `grade`=OLD.`grade` AND `class`=OLD.`class`"
+            on_delete.append(
+                f"UPDATE `{table}` SET `total`=`total`-COALESCE(OLD.`score`, 0), "
+                f"`count`=`count`-(OLD.`score` IS NOT NULL) WHERE {where};")
+            on_delete.append(f"DELETE FROM `{table}` WHERE {where} AND `count`<=0;")
+        triggers = {"insert": on_insert, "delete": on_delete, "update": on_delete + on_insert}
+        existing = {row[0] for row in self.sql.execute("SELECT name FROM sqlite_master WHERE type='trigger'", table_name="sqlite_master")}
+        for event, statements in triggers.items():
+            self.sql.execute(f"CREATE TRIGGER IF NOT EXISTS `trg_{self.table}_{event}_summary` "
+                             f"AFTER {event.upper()} ON `{self.table}` BEGIN {' '.join(statements)} END", table_name=self.table)
+        if f"trg_{self.table}_insert_summary" not in existing and self.count():
+            self.rebuild_summaries()  # 建汇总表之前就有的分数
+
+    def rebuild_summaries(self) -> int:
+        """
+        清空并从 scores 重新计算所有汇总表（触发器被绕过或汇总表损坏时使用）
+        :return: 重建后的汇总行数
+        """
+        rebuilt = 0
+        with self.sql.transaction():
+            for table, key in SUMMARY_TABLES.values():
+                self.sql.execute(f"DELETE FROM `{table}`", table_name=table)
+                period = key.format(r=f"`{self.table}`")
+                self.sql.execute(
+                    f"INSERT INTO `{table}` (`period`, `grade`, `class`, `total`, `count`) "
+                    f"SELECT {period}, `grade`, `class`, TOTAL(`score`), COUNT(`score`) FROM `{self.table}` "
+                    f"GROUP BY 1, `grade`, `class` HAVING COUNT(`score`) > 0", table_name=table)
+                rebuilt += self.sql.execute(f"SELECT COUNT(*) FROM `{table}`", table_name=table)[0][0]
+        _echo(f"<$> 已重建 {rebuilt} 条汇总")
+        return rebuilt
+
+    def summary_key(self, period: str, date: str) -> str:
+        """
+        :param period: "day" / "week" / "month"
+        :param date: "YYYY-MM-DD"
+        :return: date 所在周期在汇总表中的键
+        """
+        if period not in SUMMARY_TABLES:
+            raise ValueError(f"未知的统计周期：{period}，可选 {tuple(SUMMARY_TABLES)}")
+        partition = resolve_partition(date)  # 与 SUMMARY_TABLES 中的 SQL 表达式算法相同
+        return {"day": partition.date, "week": partition.week, "month": partition.month}[period]
+
+    def get_summary(self, period: str, date: str, grade: str = None) -> list[tuple]:
+        """
+        直接读取汇总表，代价只与班级数有关
+        :param period: "day" / "week" / "month"
+        :param date: 周期内的任意一天 "YYYY-MM-DD"
+        :param grade: 只读这个年级，默认全校
+        :return: [(年级, 班级, 总分, 平均分, 格数, 年级内排名), ...]，按年级、名次排序
+        """
+        key = self.summary_key(period, date)
+        table = SUMMARY_TABLES[period][0]
+        sql = (f"SELECT `grade`, `class`, `total`, `total` * 1.0 / `count`, `count`, "
+               f"RANK() OVER (PARTITION BY `grade` ORDER BY `total` DESC) FROM `{table}` WHERE `period`=?")
+        params = [key]
+        if grade is not None:
+            sql += " AND `grade`=?"
+            params.append(str(grade))
+        sql += " ORDER BY `grade`, 6, `class`"
+        return [tuple(row) for row in self.sql.execute(sql, params, table_name=table)]
+
+    def count(self, grader: str = None) -> int:
+        if grader is None:
+            rows = self.sql.execute(f"SELECT COUNT(*) FROM `{self.table}`", table_name=self.table)
+        else:
+            rows = self.sql.execute(f"SELECT COUNT(*) FROM `{self.table}` WHERE `grader`=?", (grader,), table_name=self.table)
+        return rows[0][0] if rows else 0
+
+    def save_many(self, grader: str, date: str, grade: str, rows: list[tuple]) -> int:
+        """
+        保存一个打分员某天提交的分数，同一 (班级, 第几天) 已有分数时覆盖
+        :param rows: [(班级, 第几天, 分数), ...]
+        :return: 写入的行数
+        """
+        return self.sql.executemany(
+            f"INSERT INTO `{self.table}` (`grader`, `date`, `grade`, `class`, `weekday`, `score`) "
+            f"VALUES (?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(`grader`, `date`, `class`, `weekday`) DO UPDATE SET "
+            f"`grade`=excluded.`grade`, `score`=excluded.`score`",
+            ((grader, date, str(grade), str(class_), _to_integer(weekday), _to_real(score))
+             for class_, weekday, score in rows), table_name=self.table)
+
+    def update_score(self, grader: str, date: str, class_: str, weekday, score) -> int:
+        """
+        :return: 修改的行数（0 表示这一格没有分数）
+        :raises ValueError: weekday 或 score 不是数字
+        """
+        return self.sql.update_data(self.table, {"score": score},
+                                    {"grader": grader, "date": date, "class": str(class_),
+                                     "weekday": _to_integer(weekday)})
+
+    def delete_scores(self, grader: str, date: str, class_: str = None, weekday=None) -> int:
+        """
+        删除一个打分员某天的分数，class_/weekday 为空时不按它筛选
+        :return: 删除的行数
+        :raises ValueError: weekday 不是整数
+        """
+        conditions = {"grader": grader, "date": date}
+        if class_ is not None:
+            conditions["class"] = str(class_)
+        if weekday is not None:
+            conditions["weekday"] = _to_integer(weekday)
+        return self.sql.delete_data(self.table, conditions)
+
+    def get_scores(self, grader: str, date: str, limit: int = None) -> list[tuple]:
+        """
+        :return: 一个打分员某天的分数 [(班级, 第几天, 分数), ...]，按保存顺序
+        """
+        return list(self.sql.iter_data(self.table, columns=["class", "weekday", "score"],
+                                       conditions={"grader": grader, "date": date}, limit=limit))
+
+
+_score_store: ScoreStore | None = None
+_score_store_lock = threading.Lock()
+
+
+def get_score_store() -> ScoreStore:
+    """
+    获取进程内共享的分数库，第一次使用时自动导入 Leaf 目录下还没导入的旧数据库，
+    直到全部导入成功为止（中途失败的下次启动继续导入剩下的文件）
+    :return: ScoreStore
+    """
+    global _score_store
+    with _score_store_lock:
+        if _score_store is None:
+            store = ScoreStore()
+            if store.get_meta("leaf_import") != "done" and os.path.isdir("Leaf"):
+                import_leaf_databases("Leaf", store)
+            _score_store = store
+        return _score_store
+
 #============================Leaf=======================================
-class Leaf:
-    def __init__(self,user_name: str):
+SCHOOL_DAYS = 5  # 一周有5天上学
+# Leaf 每天一张表的列定义：分数按数值存储，SUM/AVG/ORDER BY 不需要逐行转换
+LEAF_COLUMNS = [("class", "TEXT"), ("day", "INTEGER"), ("score", "REAL")]
+
+
+def migrate_leaf_database(db_file: str) -> int:
+    """
+    把旧的 Leaf 月数据库（所有列都是 TEXT）原地改写为带类型的 STRICT 表
+    无法转换为数字的分数会被置为 NULL 并打印提示
+    :param db_file: Leaf/<user>/<YYYY-MM>.db
+    :return: 改写的表数
+    """
+    sql = MyEasySQLite(db_file)
+    try:
+        tables = [row[0] for row in sql.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'", table_name="sqlite_master")]
+        migrated = 0
+        for table in tables:
+            types = {row["name"]: (row["type"] or "").upper()
+                     for row in sql.execute(f"PRAGMA table_info(`{table}`)", table_name=table)}
+            if set(types) != {"_id", "class", "day", "score"} or types["score"] == "REAL":
+                continue  # 不是 Leaf 分数表或已经迁移过
+            rows = []
+            for _id, class_, day, score in sql.iter_data(table, columns=["_id", "class", "day", "score"]):
+                converted = []
+                for value, convert in ((day, _to_integer), (score, _to_real)):
+                    try:
+                        converted.append(convert(value))
+                    except (TypeError, ValueError):
+                        print(f"<$> {db_file} 表「{table}」第 {_id} 行的值 {value!r} 无法转换为数字，已置空")
+                        converted.append(None)
+                rows.append({"_id": _id, "class": class_, "day": converted[0], "score": converted[1]})
+            temp = f"{table}__typed"
+            with sql.transaction():
+                sql.execute(f"DROP TABLE IF EXISTS `{temp}`", table_name=temp)
+                sql.create_table(temp, LEAF_COLUMNS, strict=True)
+                if rows:
+                    sql.add_many(temp, rows)
+                sql.execute(f"DROP TABLE `{table}`", table_name=table)
+                sql.execute(f"ALTER TABLE `{temp}` RENAME TO `{table}`", table_name=temp)
+                sql.create_index(table, ["class", "day"])
+            forget_column_types(db_file)
+            migrated += 1
+        if migrated:
+            sql.execute("VACUUM")
+            _echo(f"<$> {db_file} 已迁移 {migrated} 张表")
+    finally:
+        sql.close()  # 一次迁移很多个文件，逐个释放连接
+    return migrated
+
+
+def migrate_leaf_databases(root: str = "Leaf") -> int:
+    """
+    迁移 root 下所有打分员的月数据库（Leaf/<user>/<YYYY-MM>.db）
+    :return: 改写的表数
+    """
+    migrated = 0
+    if not os.path.isdir(root):
+        return migrated
+    for user_name in sorted(os.listdir(root)):
+        folder = os.path.join(root, user_name)
+        if not os.path.isdir(folder):
+            continue
+        for file_name in sorted(os.listdir(folder)):
+            if file_name.endswith(".db"):
+                db_file = os.path.join(folder, file_name)
+                set_profile(db_file, "archive")
+                try:
+                    migrated += migrate_leaf_database(db_file)
+                finally:
+                    set_profile(db_file, None)
+    return migrated
+
+
+def _read_leaf_database(db_file: str, month: str) -> dict[tuple[str, str], list[tuple]]:
+    """
+    用只读连接（不经过连接池、用完即关）读出一个旧 Leaf 月数据库的全部分数
+    :return: {(日期, 年级): [(班级, 第几天, 分数), ...]}
+    """
+    result: dict[tuple[str, str], list[tuple]] = {}
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+        for table in tables:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info(`{table}`)")}
+            if not table.isdigit() or not {"class", "day", "score"} <= columns:
+                continue
+            date = f"{month}-{int(table):02d}"
+            for class_, day, score in conn.execute(f"SELECT `class`, `day`, `score` FROM `{table}` ORDER BY `_id`"):
+                try:
+                    row = (class_, _to_integer(day), _to_real(score))
+                except (TypeError, ValueError):
+                    print(f"<$> {db_file} 表「{table}」的值 {(class_, day, score)!r} 无法转换为数字，已跳过")
+                    continue
+                # 班级名由 年级 + 两位班号 组成，如 "601"
+                result.setdefault((date, str(class_)[:-2]), []).append(row)
+    finally:
+        conn.close()
+    return result
+
+
+def import_leaf_databases(root: str = "Leaf", store: ScoreStore = None, force: bool = False) -> int:
+    """
+    把 root 下旧的 Leaf/<user>/<YYYY-MM>.db（每天一张表）导入分数库，
+    表名是日期中的“日”，同一格重复保存过的以最后一次为准
+    每个文件的分数和“已导入”记录在同一个事务中提交，中断后再次执行只导入剩下的文件；
+    全部成功后在分数库中记下 leaf_import=done
+    :param root: Leaf 目录
+    :param store: 目标分数库，默认共享的分数库
+    :param force: 是否重新导入已经导入过的文件
+    :return: 导入的行数
+    """
+    if store is None:
+        store = get_score_store()
+    imported = 0
+    if not os.path.isdir(root):
+        return imported
+    done = set() if force else store.imported_sources()
+    failed = 0
+    set_profile(store.sql.db_file, "bulk-import")
+    try:
+        for user_name in sorted(os.listdir(root)):
+            folder = os.path.join(root, user_name)
+            if not os.path.isdir(folder):
+                continue
+            for file_name in sorted(os.listdir(folder)):
+                month = file_name[:-3]
+                source = f"{user_name}/{file_name}"
+                if not file_name.endswith(".db") or len(month.split("-")) != 2 or source in done:
+                    continue
+                db_file = os.path.join(folder, file_name)
+                try:
+                    scores = _read_leaf_database(db_file, month)
+                    written = 0
+                    with store.sql.transaction():
+                        for (date, grade), rows in scores.items():
+                            written += store.save_many(user_name, date, grade, rows)
+                        store.mark_imported(source, written)
+                except (sqlite3.Error, ValueError) as e:
+                    failed += 1
+                    print(f"<$> 导入 {db_file} 失败：{e}")
+                    continue
+                imported += written
+        if not failed:
+            store.set_meta("leaf_import", "done")
+    finally:
+        set_profile(store.sql.db_file, None)
+    _echo(f"<$> 已从 {root} 导入 {imported} 条分数" + (f"，{failed} 个文件失败，下次继续" if failed else ""))
+    return imported
+
+
+class LeafHistory:
+    def __init__(self, grader: str, root: str = "Leaf", include_store: bool = False):
         """
-        Leaf是最底层的数据结构，用于存储打分员每周的分数
-        :param user_name: 用户名
+        LeafHistory 把一个打分员的 Leaf/<grader>/<YYYY-MM>.db 用 ATTACH DATABASE 挂到同一个连接上，
+        范围内每天的表合成一个视图 history(date, class, weekday, score)，一条 SQL 就能跨月查询
+        只挂范围需要的月份；换范围时复用连接，只挂新增的、卸下不再需要的
+        :param grader: 打分员
+        :param root: Leaf 目录
+        :param include_store: 是否把分数库（data/scores.db）里这个打分员的分数也并入 history
         """
-        import json
-        import os
+        self.grader = grader
+        self.folder = os.path.join(root, grader)
+        self.include_store = include_store
+        # 用 URI 方式打开，ATTACH 的 file:...?mode=ro 才会按只读 URI 解析，而不是当成文件名
+        self.conn = sqlite3.connect("file::memory:", uri=True)
+        self.attached: dict[str, str] = {}  # {"YYYY-MM": 挂载名}
+        self.start = self.end = None
 
-        def read_config(file_path='config.json'):
-            """
-            读取 config.json 配置文件并返回其内容。
+    def _attach(self, schema: str, db_file: str) -> None:
+        path = os.path.abspath(db_file).replace("'", "''")
+        self.conn.execute(f"ATTACH DATABASE 'file:{path}?mode=ro' AS `{schema}`")
 
-            参数:
-                file_path (str): 配置文件路径，默认为 'config.json'
+    def open_range(self, start: str, end: str) -> "LeafHistory":
+        """
+        :param start: 起始日期 "YYYY-MM-DD"
+        :param end: 结束日期 "YYYY-MM-DD"
+        :return: self
+        :raises ValueError: 日期格式不对，或 start 晚于 end
+        """
+        # 日期会直接拼进视图的 SQL，先规范成 YYYY-MM-DD
+        start, end = resolve_partition(start).date, resolve_partition(end).date
+        if start > end:
+            raise ValueError(f"起始日期 {start} 晚于结束日期 {end}")
+        months = set()
+        if os.path.isdir(self.folder):
+            months = {f[:-3] for f in os.listdir(self.folder)
+                      if f.endswith(".db") and len(f[:-3].split("-")) == 2 and start[:7] <= f[:-3] <= end[:7]}
+        limit = self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - (1 if self.include_store else 0)
+        if len(months) > limit:
+            raise ValueError(f"{start}~{end} 需要挂载 {len(months)} 个月，超过 SQLite 的上限 {limit}")
+        self.conn.execute("DROP VIEW IF EXISTS temp.`history`")
+        for month in sorted(set(self.attached) - months):
+            self.conn.execute(f"DROP VIEW IF EXISTS temp.`{self.attached[month]}`")
+            self.conn.execute(f"DETACH DATABASE `{self.attached.pop(month)}`")
+        for month in sorted(months - set(self.attached)):
+            schema = "m_" + month.replace("-", "_")
+            self._attach(schema, os.path.join(self.folder, f"{month}.db"))
+            self.attached[month] = schema
+        if self.include_store and "store" not in {row[1] for row in self.conn.execute("PRAGMA database_list")}:
+            if os.path.exists(SCORE_DB_FILE):
+                self._attach("store", SCORE_DB_FILE)
 
-            返回:
-                dict: JSON 文件解析后的 Python 字典
+        # 每个月一个视图（最多 31 张表），history 再把各月和分数库合起来，避开复合查询的条数上限
+        # 已经导入分数库的日期以分数库为准，旧表里的同一天不再重复计入
+        has_store = self.include_store and "store" in {row[1] for row in self.conn.execute("PRAGMA database_list")}
+        grader = self.grader.replace("'", "''")
+        imported = (f" WHERE `date` NOT IN (SELECT `date` FROM `store`.`scores` WHERE `grader`='{grader}')"
+                    if has_store else "")
+        parts = []
+        for month, schema in sorted(self.attached.items()):
+            selects = []
+            for (table,) in self.conn.execute(f"SELECT name FROM `{schema}`.sqlite_master WHERE type='table'"):
+                if not table.isdigit() or not start <= f"{month}-{int(table):02d}" <= end:
+                    continue
+                columns = {row[1] for row in self.conn.execute(f"PRAGMA `{schema}`.table_info(`{table}`)")}
+                if not {"_id", "class", "day", "score"} <= columns:
+                    continue
+                # 旧的 Leaf.save 是追加写入，同一格只取 _id 最大的有效分数（与 import_leaf_databases 一致）
+                selects.append(f"SELECT '{month}-{int(table):02d}' AS `date`, `class`, "
+                               f"CAST(`day` AS INTEGER) AS `weekday`, CAST(`score` AS REAL) AS `score` "
+                               f"FROM `{schema}`.`{table}` WHERE `_id` IN "
+                               f"(SELECT MAX(`_id`) FROM `{schema}`.`{table}` WHERE `score` GLOB '*[0-9]*' "
+                               f"GROUP BY `class`, CAST(`day` AS INTEGER))")
+            self.conn.execute(f"DROP VIEW IF EXISTS temp.`{schema}`")
+            if selects:
+                self.conn.execute(f"CREATE TEMP VIEW `{schema}` AS {' UNION ALL '.join(selects)}")
+                parts.append(f"SELECT * FROM temp.`{schema}`{imported}")
+        if has_store:
+            parts.append(f"SELECT `date`, `class`, `weekday`, `score` FROM `store`.`scores` "
+                         f"WHERE `grader`='{grader}' AND `date` BETWEEN '{start}' AND '{end}'")
+        if not parts:
+            parts.append("SELECT NULL AS `date`, NULL AS `class`, NULL AS `weekday`, NULL AS `score` WHERE 0")
+        self.conn.execute(f"CREATE TEMP VIEW `history` AS {' UNION ALL '.join(parts)}")
+        self.start, self.end = start, end
+        return self
 
-            异常:
-                FileNotFoundError: 如果文件不存在
-                json.JSONDecodeError: 如果文件内容不是合法的 JSON
-            """
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"配置文件 '{file_path}' 不存在。")
+    def query(self, sql: str, params=()) -> list[tuple]:
+        """
+        在 history 视图上执行查询，如 "SELECT class, SUM(score) FROM history GROUP BY class"
+        """
+        started = time.perf_counter()
+        rows = self.conn.execute(sql, params).fetchall()
+        if QUERY_HOOKS:
+            _dispatch_query_event(QueryEvent(self.folder, "history", "history", time.perf_counter() - started,
+                                             len(rows), False))
+        return rows
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        def spawn_class(grade: int = 1, max_class: int = 6) -> list:
-            results = []
-            for i in range(max_class):
-                results.append(f"{grade}0{i+1}")
-            return results
+    def scores(self) -> list[tuple]:
+        """
+        :return: 当前范围内的全部分数 [(日期, 班级, 第几天, 分数), ...]，按日期排序
+        """
+        return self.query("SELECT `date`, `class`, `weekday`, `score` FROM `history` ORDER BY `date`, `class`, `weekday`")
+
+    def close(self) -> None:
+        self.conn.close()
+        self.attached.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
+
+class Leaf:
+    def __init__(self,user_name: str):
+        """
+        Leaf是最底层的数据结构，用于存储打分员每周的分数
+        :param user_name: 用户名
+        """
+        grader = get_grader_setting(user_name)
+        if grader is None:
+            raise KeyError(f"打分员 {user_name} 还没有设置管理的班级")
         self.user_name = user_name
-        self.data = []
-        self.__data_sum: int = len(self.data)
         self.__location: str = f"{user_name}"
-        _grade = read_config()["grade"]
-        _max_class = read_config()["m_number"]
+        self.grade = grader.grade
 
-        self.classes = spawn_class(grade = _grade, max_class = _max_class)
+        self.classes = grader.classes
+        # 分数矩阵：行是班级（与 self.classes 同序），列是一周的 5 个上学日；filled 标记哪些格已填写
+        self.scores = np.full((len(self.classes), SCHOOL_DAYS), np.nan)
+        self.filled = np.zeros(self.scores.shape, dtype=bool)
     @property
-    def data_sum(self) :
-        self.__data_sum = len(self.data)
-        return self.__data_sum
-    @data_sum.setter
-    def data_sum(self,data_sum):
-        self.data_sum = data_sum
-    def add_data(self,data:str):
-        if data or (data.isdigit()):
-            if self.data_sum < len(self.classes) * 5 + 1:       # 一周有5天上学
-                self.data.append(data)
-                print(f"<$>数据{data}添加成功")
-        else:
-            ascii_red = "\033[31m"
-            ascii_white = "\033[37m"
+    def data(self) -> list[float]:
+        """
+        按 班级 → 第几天 的顺序列出已填写的分数
+        """
+        return self.scores[self.filled].tolist()
+    @property
+    def data_sum(self) -> int:
+        """
+        已填写的格数
+        """
+        return int(np.count_nonzero(self.filled))
+    @staticmethod
+    def parse_score(data) -> float | None:
+        """
+        :return: 合法的分数（有限的数值），不合法时返回 None
+        """
+        try:
+            value = float(data)
+        except (TypeError, ValueError):
+            return None
+        return value if np.isfinite(value) else None
+    def _reject(self, data) -> None:
+        ascii_red = "\033[31m"
+        ascii_white = "\033[37m"
 
-            print(f"{ascii_red}<<<   !!!   >>>输入不合规{data}{ascii_white}")
-    def delete_data(self, conditions: dict):
-        if not conditions:
-            try:
-                sql: MyEasySQLite = MyEasySQLite(f"Leaf\\{self.user_name}\\{get_time()['y']}-{get_time()['m']}.db")
-                table_name = f"{get_time()['d']}"
-                sql.create_table(table_name, ["mouth","class", "score"])
-                sql.delete_data(table_name, conditions)
-            except sqlite3.Error as e:
-                print(e)
-    def save(self) -> None:
-        """
-        保存这个Leaf到 ".\\Leaf\\ {user_name}\\{time}.db"文件中
-        """
-        create_folders(f"Leaf/{self.__location}")
-        sql: MyEasySQLite = MyEasySQLite(f"Leaf/{self.__location}/{get_time()['y']}-{get_time()['m']}.db")
-        table_name = f"{get_time()['d']}"
-        sql.create_table(table_name, ["class", "day", "score"])
-        k = 0
-        for i in self.classes:
-            for j in range(5):
-                sql.add_data(table_name, {"day": f"{j + 1}", "class": f"{i}", "score": self.data[k]})
-                k += 1
-        sql.close()
-        print(f"保存至{get_time()['d']}")
+        print(f"{ascii_red}<<<   !!!   >>>输入不合规{data}{ascii_white}")
+    def add_data(self,data:str):
+        """
+        把分数填进下一个空格（按 班级 → 第几天 的顺序）
+        """
+        value = self.parse_score(data)
+        if value is None:
+            self._reject(data)
+            return
+        empty = np.flatnonzero(~self.filled)
+        if not empty.size:
+            print(f"<$> 本周分数已全部填写，{data} 未添加")
+            return
+        row, col = divmod(int(empty[0]), SCHOOL_DAYS)
+        self.scores[row, col] = value
+        self.filled[row, col] = True
+        _echo(f"<$>数据{data}添加成功")
+    def set_score(self, class_: str, day: int, data) -> bool:
+        """
+        直接填写某个班第几天（1~5）的分数
+        :return: 是否填写成功
+        """
+        value = self.parse_score(data)
+        day = str(day)
+        if value is None or str(class_) not in self.classes or not (day.isdigit() and 1 <= int(day) <= SCHOOL_DAYS):
+            self._reject(f"{class_}班第{day}天：{data}")
+            return False
+        row = self.classes.index(str(class_))
+        self.scores[row, int(day) - 1] = value
+        self.filled[row, int(day) - 1] = True
+        return True
+    def class_totals(self) -> dict[str, float]:
+        """
+        :return: {班级: 本周已填写分数之和}
+        """
+        return dict(zip(self.classes, np.where(self.filled, self.scores, 0).sum(axis=1).tolist()))
+    def day_averages(self) -> list[float | None]:
+        """
+        :return: 每个上学日各班的平均分，当天还没有分数时为 None
+        """
+        counts = self.filled.sum(axis=0)
+        totals = np.where(self.filled, self.scores, 0).sum(axis=0)
+        return [total / count if count else None for total, count in zip(totals.tolist(), counts.tolist())]
+    def delete_data(self, conditions: dict, date=None):
+        """
+        删除这个打分员某天保存的分数
+        :param conditions: {"class": 班级, "day": 第几天}，缺少的键不参与筛选，为空时删除当天的全部分数
+        :param date: "YYYY-MM-DD"，默认今天
+        """
+        try:
+            get_score_store().delete_scores(self.user_name, resolve_partition(date).date,
+                                            conditions.get("class"), conditions.get("day"))
+        except (ValueError, sqlite3.Error) as e:
+            print(f"<$> 删除分数失败：{e}")
+    def save(self, date=None) -> None:
+        """
+        保存这个Leaf到分数库（data/scores.db）
+        :param date: 保存到哪一天 "YYYY-MM-DD"，默认今天
+        """
+        date = resolve_partition(date).date
+        class_index, day_index = np.nonzero(self.filled)  # 只保存已填写的格
+        rows = [(self.classes[i], j + 1, v)
+                for i, j, v in zip(class_index.tolist(), day_index.tolist(), self.scores[self.filled].tolist())]
+        store = get_score_store()
+        with store.sql.transaction():  # 整周分数一起提交，不会只保存一半
+            store.save_many(self.user_name, date, self.grade, rows)
+        print(f"保存至{date}")
 
@@ -0,0 +1,166 @@
+# model : aggregation
+# 分数统计：按天/周/月/任意日期范围汇总各班总分、平均分和年级内排名
+import datetime
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from SQLite_funcs import ScoreStore, get_score_store, resolve_partition
+
+PERIODS = ("day", "week", "month")
+SUMMARY_COLUMNS = ["grade", "class", "total", "average", "count", "rank"]
+
+
+def period_range(period: str = "week", day: str = None) -> tuple[str, str]:
+    """
+    计算 day 所在的统计区间
+    :param period: "day" / "week"（周一到周日）/ "month"
+    :param day: 日期 "YYYY-MM-DD"，默认今天
+    :return: (起始日期, 结束日期)，都包含在内
+    """
+    d = datetime.date.fromisoformat(resolve_partition(day).date)
+    if period == "day":
+        start, end = d, d
+    elif period == "week":
+        start = d - datetime.timedelta(days=d.weekday())
+        end = start + datetime.timedelta(days=6)
+    elif period == "month":
+        start = d.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    else:
+        raise ValueError(f"未知的统计周期：{period}，可选 {PERIODS}")
+    return start.isoformat(), end.isoformat()
+
+
+def class_summary(start: str, end: str, grade: str = None, store: ScoreStore = None) -> pd.DataFrame:
+    """
+    汇总 [start, end] 内所有打分员给出的分数
+    分组、求和与排名都在 SQLite 里完成（GROUP BY + RANK() 窗口函数），只把每班一行结果读回来
+    :param start: 起始日期 "YYYY-MM-DD"
+    :param end: 结束日期 "YYYY-MM-DD"
+    :param grade: 只统计这个年级，默认全校
+    :param store: 分数库，默认共享的分数库
+    :return: DataFrame，列为 grade, class, total, average, count, rank（年级内按总分排名，并列同名次）
+    """
+    if store is None:
+        store = get_score_store()
+    sql = (f"SELECT `grade`, `class`, SUM(`score`), AVG(`score`), COUNT(`score`), "
+           f"RANK() OVER (PARTITION BY `grade` ORDER BY SUM(`score`) DESC) "
+           f"FROM `{store.table}` WHERE `date` BETWEEN ? AND ?")
+    params = [start, end]
+    if grade is not None:
+        sql += " AND `grade`=?"
+        params.append(str(grade))
+    sql += " GROUP BY `grade`, `class` ORDER BY `grade`, 6, `class`"
+    rows = store.sql.execute(sql, params, table_name=store.table)
+    return pd.DataFrame([tuple(row) for row in rows], columns=SUMMARY_COLUMNS)
+
+
+def class_ranking(period: str = "week", day: str = None, grade: str = None,
+                  store: ScoreStore = None) -> pd.DataFrame:
+    """
+    day 所在的天/周/月的班级排名，直接读取分数库维护的汇总表，不扫描原始分数
+    :param period: "day" / "week" / "month"
+    :param day: 日期 "YYYY-MM-DD"，默认今天
+    :param grade: 只统计这个年级，默认全校
+    :return: 同 class_summary
+    """
+    if period not in PERIODS:
+        raise ValueError(f"未知的统计周期：{period}，可选 {PERIODS}")
+    if store is None:
+        store = get_score_store()
+    return pd.DataFrame(store.get_summary(period, resolve_partition(day).date, grade), columns=SUMMARY_COLUMNS)
+
+
+def find_leaf_databases(start: str, end: str, root: str = "Leaf") -> list[tuple[str, str, str]]:
+    """
+    找出与 [start, end] 有交集的旧 Leaf 月数据库
+    :return: [(打分员, "YYYY-MM", 文件路径), ...]
+    """
+    found = []
+    if not os.path.isdir(root):
+        return found
+    for grader in sorted(os.listdir(root)):
+        folder = os.path.join(root, grader)
+        if not os.path.isdir(folder):
+            continue
+        for file_name in sorted(os.listdir(folder)):
+            month = file_name[:-3]
+            if file_name.endswith(".db") and len(month.split("-")) == 2 and start[:7] <= month <= end[:7]:
+                found.append((grader, month, os.path.join(folder, file_name)))
+    return found
+
+
+def _leaf_partial(db_file: str, month: str, start: str, end: str, grade: str = None) -> list[tuple]:
+    """
+    在一个月数据库里把范围内每天的表 UNION ALL 起来，按班级求和/计数，只返回每班一行
+    旧的 Leaf.save 是追加写入，同一格保存多次会留下多行，只取 _id 最大的一行（与 import_leaf_databases 一致）
+    用只读连接，不经过连接池（工作线程/进程用完即关）
+    :param grade: 只统计这个年级，默认全部
+    :return: [(班级, 总分, 格数), ...]
+    """
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_file)}?mode=ro", uri=True)
+    try:
+        selects = []
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"):
+            if not table.isdigit() or not start <= f"{month}-{int(table):02d}" <= end:
+                continue
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info(`{table}`)")}
+            if {"_id", "class", "day", "score"} <= columns:
+                # 旧表的分数可能是文本，空串和非数字不计入
+                selects.append(f"SELECT `class`, `score` FROM `{table}` WHERE `_id` IN "
+                               f"(SELECT MAX(`_id`) FROM `{table}` WHERE `score` GLOB '*[0-9]*' "
+                               f"GROUP BY `class`, CAST(`day` AS INTEGER))")
+        if not selects:
+            return []
+        sql = f"SELECT `class`, TOTAL(CAST(`score` AS REAL)), COUNT(*) FROM ({' UNION ALL '.join(selects)})"
+        params = ()
+        if grade is not None:
+            sql += " WHERE substr(`class`, 1, length(`class`) - 2)=?"  # 班级名由 年级 + 两位班号 组成
+            params = (str(grade),)
+        return conn.execute(f"{sql} GROUP BY `class`", params).fetchall()
+    finally:
+        conn.close()
+
+
+def leaf_report(start: str, end: str, root: str = "Leaf", grade: str = None, workers: int = None,
+                processes: bool = False) -> pd.DataFrame:
+    """
+    直接从旧的 Leaf/<打分员>/<YYYY-MM>.db 统计 [start, end]（没有导入分数库的历史数据）
+    每个月数据库交给线程池（processes=True 时用进程池）中的一个任务，过滤和按班级汇总在 SQLite 里完成，
+    最后把各文件的部分结果合并、排名
+    :param start: 起始日期 "YYYY-MM-DD"
+    :param end: 结束日期 "YYYY-MM-DD"
+    :param root: Leaf 目录
+    :param grade: 只统计这个年级，默认全校
+    :param workers: 并发数，默认 CPU 核数
+    :param processes: 是否使用进程池
+    :return: 同 class_summary
+    """
+    files = find_leaf_databases(start, end, root)
+    partials = []
+    if files:
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor(max_workers=min(workers or os.cpu_count() or 1, len(files))) as pool:
+            futures = [pool.submit(_leaf_partial, db_file, month, start, end, grade)
+                       for _grader, month, db_file in files]
+            partials = [row for future in futures for row in future.result()]
+    df = pd.DataFrame(partials, columns=["class", "total", "count"])
+    df["class"] = df["class"].astype(str)
+    df["grade"] = df["class"].str[:-2]  # 班级名由 年级 + 两位班号 组成
+    df = df.groupby(["grade", "class"], as_index=False)[["total", "count"]].sum()
+    df["average"] = df["total"] / df["count"]
+    df["rank"] = df.groupby("grade")["total"].rank(method="min", ascending=False).astype(int)
+    return df.sort_values(["grade", "rank", "class"])[SUMMARY_COLUMNS].reset_index(drop=True)
+
+
+def export_summary(df: pd.DataFrame, path: str) -> None:
+    """
+    导出统计结果，按扩展名选择 .csv 或 .xlsx
+    """
+    if path.lower().endswith(".csv"):
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        df.to_excel(path, index=False)
@@ -0,0 +1,125 @@
+# model : app_config
+# config.json 的唯一读取入口：解析一次后缓存，文件的 mtime/大小变化时才重新读取
+import copy
+import json
+import os
+import threading
+from typing import NamedTuple
+
+CONFIG_FILE = "config.json"
+
+
+class GraderConfig(NamedTuple):
+    """一个打分员管理的班级设置"""
+    grade: str
+    type: str
+    m_number: int
+
+    @property
+    def classes(self) -> list[str]:
+        """
+        :return: 所管理的班级名，如 ["601", "602", ...]
+        """
+        return [f"{self.grade}0{i + 1}" for i in range(self.m_number)]
+
+
+class ConfigService:
+    def __init__(self, path: str = CONFIG_FILE):
+        """
+        ConfigService 缓存 config.json 的内容，多线程共用一份
+            {
+                "u_name1" : {"grade": "6", "type": "...", "m_number": "6"},
+                ...
+            }
+        :param path: 配置文件路径
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._data: dict = {}
+        self._stamp: tuple | None = None
+        self._graders: dict[str, GraderConfig | None] = {}
+
+    def _file_stamp(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> dict:
+        """
+        返回缓存的配置，文件变化时重新解析（需持有锁）
+        """
+        stamp = self._file_stamp()
+        if stamp is None:
+            raise FileNotFoundError(f"配置文件 '{self.path}' 不存在。")
+        if stamp != self._stamp:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+            self._stamp = stamp
+            self._graders.clear()
+        return self._data
+
+    def read(self) -> dict:
+        """
+        :return: 整个配置的副本（改动它不会影响缓存）
+        """
+        with self._lock:
+            return copy.deepcopy(self._load())
+
+    def get_grader(self, name: str) -> GraderConfig | None:
+        """
+        :param name: 打分员明文姓名
+        :return: 该打分员的班级设置，没有设置时返回 None
+        """
+        with self._lock:
+            data = self._load()
+            if name not in self._graders:
+                entry = data.get(name)
+                if not isinstance(entry, dict) and "grade" in data:
+                    entry = data  # 旧格式：整个文件只有一组 grade/m_number
+                self._graders[name] = None
+                if isinstance(entry, dict) and "grade" in entry and "m_number" in entry:
+                    try:
+                        m_number = int(entry["m_number"])
+                    except (TypeError, ValueError):
+                        m_number = 0  # 旧版对话框被关掉时会保存空的班级数，当作没有设置
+                    if m_number > 0:
+                        self._graders[name] = GraderConfig(str(entry["grade"]).strip(), str(entry.get("type", "")),
+                                                           m_number)
+            return self._graders[name]
+
+    def _write(self, data: dict) -> None:
+        """
+        先写临时文件再替换，读者不会读到写了一半的文件（需持有锁）
+        """
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(temp, self.path)
+        self._data = data
+        self._stamp = self._file_stamp()
+        self._graders.clear()
+
+    def write(self, data: dict) -> None:
+        """
+        用 data 替换整个配置文件
+        """
+        with self._lock:
+            self._write(copy.deepcopy(data))
+
+
+_config_service: ConfigService | None = None
+_config_service_lock = threading.Lock()
+
+
+def get_config() -> ConfigService:
+    """
+    获取进程内共享的配置服务
+    :return: ConfigService
+    """
+    global _config_service
+    with _config_service_lock:
+        if _config_service is None:
+            _config_service = ConfigService()
+        return _config_service
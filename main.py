@@ -6,6 +6,9 @@ from tool_kit import JList
 from tool_kit import User
 from tool_kit import PFrame
 from tool_kit import tk
+from tool_kit import flush_account_exports, schedule_account_exports
+from tool_kit import enable_slow_query_log
+from aggregation import class_ranking
 
 
 class LoginPage(PFrame):
@@ -108,7 +111,13 @@ class AdminControl(PFrame):
                 s_user.delete_admin(s)
                 self.list.setItems(s_user.get_user_names("Admin"))
                 print("ok")
-        self.setDefaultCloseOperation("close")
+        def do_sth_when_close():
+            try:
+                flush_account_exports()
+            finally:
+                self.root.destroy()
+        self.setDefaultCloseOperation("s", f=do_sth_when_close)
+        schedule_account_exports(self.root)
 
         self.l = JLabel("校园两操卫生管理助手/管理打分员账户")
         self.list = JList()
@@ -155,8 +164,17 @@ class GraderControl(PFrame):
             s = self.list.getSelectedValue()
             if s:
                 s_user.get_m_classes(s, self.root)
+        def import_grader_roster():
+            s_user.import_roster(self.root, "Grader")
+            self.list.setItems(s_user.get_user_names("Grader"))
+        def do_sth_when_close():
+            try:
+                flush_account_exports()
+            finally:
+                self.root.destroy()
 
-        self.setDefaultCloseOperation("close")
+        self.setDefaultCloseOperation("s", f=do_sth_when_close)
+        schedule_account_exports(self.root)
 
         self.l = JLabel("校园两操卫生管理助手/管理打分员账户")
         self.list = JList()
@@ -164,6 +182,7 @@ class GraderControl(PFrame):
         self.del_button = JButton("删除 打分员")
         self.set_grade_and_m_number = JButton("设置选中的打分员所管理的班级")
         self.view_grader_control_classes = JButton("展示选中的打分员所打分的班级")
+        self.import_roster_button = JButton("从名单批量导入打分员")
 
 
         self.add_button.setBounds(0, 70, 200, 30)
@@ -172,6 +191,7 @@ class GraderControl(PFrame):
         self.list.setBounds(400, 70 , 200, 400)
         self.set_grade_and_m_number.setBounds(0, 170, 200, 30)
         self.view_grader_control_classes.setBounds(0, 220, 200, 30)
+        self.import_roster_button.setBounds(0, 270, 200, 30)
 
         self.list.setItems(s_user.get_user_names("Grader"))
 
@@ -182,14 +202,52 @@ class GraderControl(PFrame):
         self.add(self.del_button)
         self.add(self.set_grade_and_m_number)
         self.add(self.view_grader_control_classes)
+        self.add(self.import_roster_button)
 
         self.add_button.addActionListener(func=do_sth_when_click_at_add_button)
         self.del_button.addActionListener(func=do_sth_when_click_at_del_button_and_select)
         self.set_grade_and_m_number.addActionListener(func=set_grader_control_grade_and_m_number)
         self.view_grader_control_classes.addActionListener(func=view_grader_control_grade_and_m_number)
+        self.import_roster_button.addActionListener(func=import_grader_roster)
+
+class ReportPage(PFrame):
+    def __init__(self, s_user: User):
+        super().__init__("School Daily Routine and Hygiene Management Assistant", 600, 600)
+
+        def show_ranking(period: str):
+            df = class_ranking(period)
+            self.list.setItems([f"第{r['rank']}名  {r['class']}班  总分 {r['total']:g}  平均 {r['average']:.2f}"
+                                for _, r in df.iterrows()] or ["暂无分数"])
+
+        self.l = JLabel("校园两操卫生管理助手/班级排名")
+        self.d_level = JLabel(f"{s_user.login_level}@{s_user.login_name}")
+        self.list = JList()
+        self.day_button = JButton("今日排名")
+        self.week_button = JButton("本周排名")
+        self.month_button = JButton("本月排名")
+
+        self.d_level.setBounds(0, 0, 200, 30)
+        self.l.setBounds(200, 0, 200, 30)
+        self.day_button.setBounds(0, 70, 200, 30)
+        self.week_button.setBounds(0, 120, 200, 30)
+        self.month_button.setBounds(0, 170, 200, 30)
+        self.list.setBounds(220, 70, 360, 480)
+
+        self.add(self.l)
+        self.add(self.d_level)
+        self.add(self.list)
+        self.add(self.day_button)
+        self.add(self.week_button)
+        self.add(self.month_button)
+
+        self.day_button.addActionListener(func=lambda: show_ranking("day"))
+        self.week_button.addActionListener(func=lambda: show_ranking("week"))
+        self.month_button.addActionListener(func=lambda: show_ranking("month"))
+        show_ranking("week")
 
 if __name__ == '__main__':
     # 启动程序
+    enable_slow_query_log("slow_queries.log", threshold_ms=200)
     login_page = LoginPage()
     login_page.setVisible(True)
     user = login_page.user
@@ -218,9 +276,11 @@ if __name__ == '__main__':
 
 
     elif user.login_level == "Teacher":
-        pass
+        r_page = ReportPage(user)
+        r_page.setVisible(True)
 
 
+    flush_account_exports()
     print(f"OK, {user.login_level}")
 
 
@@ -0,0 +1,144 @@
+# 维护命令：python maintenance.py <命令>
+import argparse
+import sqlite3
+
+from aggregation import PERIODS, class_ranking, class_summary, export_summary, leaf_report, period_range
+
+from SQLite_funcs import ACCOUNT_DB_FILE, set_profile, migrate_leaf_databases, set_quiet, query_histogram, \
+    enable_slow_query_log, import_leaf_databases, get_score_store, get_assignment_store
+from tool_kit import USER_LEVELS, compact_credential_workbooks, export_accounts_to_xlsx, import_accounts_from_xlsx, \
+    import_roster, flush_account_exports
+
+
+def check_levels(levels: list[str]) -> list[str] | None:
+    for level in levels:
+        if level not in USER_LEVELS:
+            raise SystemExit(f"未知的账号等级：{level}")
+    return levels or None
+
+
+def cmd_compact(args):
+    compact_credential_workbooks(check_levels(args.levels))
+
+
+def cmd_import_accounts(args):
+    import_accounts_from_xlsx()
+
+
+def cmd_export_accounts(args):
+    export_accounts_to_xlsx(check_levels(args.levels))
+
+
+def cmd_import_assignments(args):
+    get_assignment_store().import_from_config()
+
+
+def cmd_export_assignments(args):
+    print(f"<$> 已导出 {get_assignment_store().export_to_config()} 个打分员的班级设置到 config.json")
+
+
+def cmd_import_roster(args):
+    set_profile(ACCOUNT_DB_FILE, "bulk-import")
+    try:
+        import_roster(args.path, args.level)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        raise SystemExit(f"导入失败：{e}")
+    finally:
+        set_profile(ACCOUNT_DB_FILE, None)
+    flush_account_exports()
+
+
+def cmd_migrate_leaf(args):
+    migrate_leaf_databases(args.root)
+
+
+def cmd_import_leaf(args):
+    import_leaf_databases(args.root, force=args.force)
+
+
+def cmd_rebuild_summaries(args):
+    get_score_store().rebuild_summaries()
+
+
+def cmd_report(args):
+    if args.start or args.end:
+        if not (args.start and args.end):
+            raise SystemExit("--start 和 --end 需要同时给出")
+    if args.leaf_root:
+        start, end = (args.start, args.end) if args.start else period_range(args.period, args.day)
+        df = leaf_report(start, end, args.leaf_root, args.grade, args.workers, args.processes)
+    elif args.start:
+        df = class_summary(args.start, args.end, args.grade)
+    else:
+        df = class_ranking(args.period, args.day, args.grade)
+    if args.out:
+        export_summary(df, args.out)
+    else:
+        print(df.to_string(index=False))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="校园两操卫生管理助手/维护命令")
+    parser.add_argument("--quiet", action="store_true", help="不打印每条语句的成功提示")
+    parser.add_argument("--timings", action="store_true", help="结束时打印各类语句的耗时直方图")
+    parser.add_argument("--slow-log", metavar="path", help="把慢语句追加写入该文件")
+    parser.add_argument("--slow-ms", type=float, default=100, help="慢语句阈值（毫秒），默认 100")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compact", help="删除账号Excel文件中的空白列")
+    p.add_argument("levels", nargs="*", metavar="level", help=f"要压缩的账号等级 {USER_LEVELS}，默认全部")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("import-accounts", help="把 data/*_names_and_passwords.xlsx 导入账号库")
+    p.set_defaults(func=cmd_import_accounts)
+
+    p = sub.add_parser("export-accounts", help="把账号库导出为 data/*_names_and_passwords.xlsx")
+    p.add_argument("levels", nargs="*", metavar="level", help=f"要导出的账号等级 {USER_LEVELS}，默认全部")
+    p.set_defaults(func=cmd_export_accounts)
+
+    p = sub.add_parser("import-assignments", help="把 config.json 中的打分员班级设置导入设置库（已有的覆盖）")
+    p.set_defaults(func=cmd_import_assignments)
+
+    p = sub.add_parser("export-assignments", help="把设置库中的打分员班级设置写回 config.json")
+    p.set_defaults(func=cmd_export_assignments)
+
+    p = sub.add_parser("import-roster", help="从名单文件（.csv/.xlsx）批量创建账号")
+    p.add_argument("path", help="名单文件，表头包含 姓名,密码[,年级,类别,班级数]")
+    p.add_argument("--level", default="Grader", choices=["Grader", "Teacher"], help="账号等级，默认 Grader")
+    p.set_defaults(func=cmd_import_roster)
+
+    p = sub.add_parser("migrate-leaf", help="把旧的 Leaf 月数据库原地改写为带类型的表（分数存为数值）")
+    p.add_argument("--root", default="Leaf", help="Leaf 目录，默认 Leaf")
+    p.set_defaults(func=cmd_migrate_leaf)
+
+    p = sub.add_parser("import-leaf", help="把 Leaf/<打分员>/<YYYY-MM>.db 中的分数导入分数库 data/scores.db")
+    p.add_argument("--root", default="Leaf", help="Leaf 目录，默认 Leaf")
+    p.add_argument("--force", action="store_true", help="重新导入已经导入过的文件")
+    p.set_defaults(func=cmd_import_leaf)
+
+    p = sub.add_parser("rebuild-summaries", help="从原始分数重新计算每日/每周/每月汇总表")
+    p.set_defaults(func=cmd_rebuild_summaries)
+
+    p = sub.add_parser("report", help="各班总分、平均分和年级排名")
+    p.add_argument("--period", default="week", choices=PERIODS, help="统计周期，默认 week")
+    p.add_argument("--day", help="统计周期所在的日期 YYYY-MM-DD，默认今天")
+    p.add_argument("--start", help="自定义起始日期 YYYY-MM-DD（与 --end 一起使用，优先于 --period）")
+    p.add_argument("--end", help="自定义结束日期 YYYY-MM-DD")
+    p.add_argument("--grade", help="只统计这个年级，默认全校")
+    p.add_argument("--out", help="导出到 .csv/.xlsx 文件，默认打印")
+    p.add_argument("--leaf-root", metavar="dir", help="直接统计该目录下旧的 Leaf 月数据库（并行读取），而不是分数库")
+    p.add_argument("--workers", type=int, help="--leaf-root 的并发数，默认 CPU 核数")
+    p.add_argument("--processes", action="store_true", help="--leaf-root 使用进程池而不是线程池")
+    p.set_defaults(func=cmd_report)
+
+    return parser
+
+
+if __name__ == '__main__':
+    arguments = build_parser().parse_args()
+    set_quiet(arguments.quiet)
+    if arguments.slow_log:
+        enable_slow_query_log(arguments.slow_log, arguments.slow_ms)
+    arguments.func(arguments)
+    if arguments.timings:
+        print(query_histogram.report())
@@ -1,10 +1,15 @@
 import base64
+import csv
+import os
+import threading
 import warnings
+from collections import OrderedDict
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
+from Crypto.Util.strxor import strxor
 from SQLite_funcs import *
 from display_gui import *
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
 from openpyxl.utils import get_column_letter
 import pandas as pd
 
@@ -37,106 +42,405 @@ def decrypt_all(d: dict[str, str]) -> dict[str, str]:
     :param d: 将要解密的字典
     :return: 解密后的字典
     """
-    result = {}
-    encryptor = FixedIVEncryptor()
-    for k in d:
-        key = encryptor.decrypt(k)
-        value = encryptor.decrypt(d[k])
-        result[key] = value
-    return result
+    keys = shared_encryptor.decrypt_many(list(d.keys()))
+    values = shared_encryptor.decrypt_many(list(d.values()))
+    return dict(zip(keys, values))
 
 
 def get_value(sheet, x: int, y: int) -> str:
     return sheet[f"{get_column_letter(x)}{y}"].value
 
 
+def _sheet_to_dict(path: str) -> dict[str, str]:
+    """
+    自动解析Excel文件提取姓名-密码映射字典
+    :param path: Excel文件路径
+    :return: {姓名: 密码}的字典，无有效数据时返回空字典
+    """
+    # 初始化返回字典
+    name_pwd_dict: dict[str, str] = {}
+
+    # 加载Excel文件
+    try:
+        wb = load_workbook(path, data_only=True)
+        sheet = wb.active
+    except FileNotFoundError:
+        warnings.warn(f"Excel文件不存在：{path}")
+        return name_pwd_dict
+    except Exception as e:
+        warnings.warn(f"加载Excel文件失败：{str(e)}")
+        return name_pwd_dict
+
+    try:
+        # 读取前两行数据（核心：第一行姓名，第二行密码，同列配对）
+        max_col = sheet.max_column  # 获取最大列数
+        for col in range(1, max_col + 1):
+            # 读取当前列的姓名（第一行）和密码（第二行）
+            name_cell = sheet.cell(row=1, column=col)
+            pwd_cell = sheet.cell(row=2, column=col)
+            name_val = name_cell.value
+            pwd_val = pwd_cell.value
+
+            # 处理非空数据
+            if name_val is not None:
+                name_str = str(name_val).strip()
+                if name_str:  # 姓名非空才处理
+                    pwd_str = str(pwd_val).strip() if pwd_val is not None else ""
+                    name_pwd_dict[name_str] = pwd_str
+
+        #   若前两行无数据，尝试读取单列多行（A1=姓名，A2=密码，A3=姓名2，A4=密码2...）
+        if not name_pwd_dict:
+            max_row = sheet.max_row
+            row = 1
+            while row <= max_row:
+                name_cell = sheet.cell(row=row, column=1)
+                pwd_cell = sheet.cell(row=row + 1, column=1) if row + 1 <= max_row else None
+                name_val = name_cell.value
+                pwd_val = pwd_cell.value if pwd_cell is not None else None
+
+                if name_val is not None:
+                    name_str = str(name_val).strip()
+                    if name_str:
+                        pwd_str = str(pwd_val).strip() if pwd_val is not None else ""
+                        name_pwd_dict[name_str] = pwd_str
+
+                row += 2  # 步长2，按行配对姓名和密码
+    except Exception as e:
+        warnings.warn(f"解析Excel数据失败：{e}")
+    finally:
+        wb.close()  # 确保关闭工作簿
+        return name_pwd_dict
+
+
+USER_LEVELS: list[str] = ["Admin", "Grader", "Teacher"]
+
+
+def credential_path(user_level: str) -> str:
+    return f"data/{user_level}_names_and_passwords.xlsx"
+
+
+# 进程级账号索引：{user_level: {加密姓名: 加密密码}}，以及每个文件解析时的 (mtime, size)
+_credential_index: dict[str, dict[str, str]] = {}
+_credential_stamps: dict[str, tuple[int, int] | None] = {}
+_credential_lock = threading.Lock()
+
+
+def _file_stamp(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def get_credential_index(user_level: str) -> dict[str, str]:
+    """
+    获取某一等级的账号索引（加密后的 {姓名: 密码}）
+    索引在进程内只构建一次，只有对应Excel文件的 mtime 或大小变化时才重新解析
+    :param user_level: "Admin" / "Grader" / "Teacher"
+    :return: 缓存的索引字典，调用方不要修改它
+    """
+    path = credential_path(user_level)
+    stamp = _file_stamp(path)
+    with _credential_lock:
+        if user_level not in _credential_index or _credential_stamps.get(user_level) != stamp:
+            _credential_index[user_level] = _sheet_to_dict(path)
+            _credential_stamps[user_level] = stamp
+        return _credential_index[user_level]
+
+
+def invalidate_credential_index() -> None:
+    """丢弃所有缓存的账号索引，下次读取时重新解析"""
+    with _credential_lock:
+        _credential_index.clear()
+        _credential_stamps.clear()
+
+
 def get_users_and_passwords() -> dict[str, dict[str, str]]:
     """
     读取Excel文件中的用户名和其对应的密码
     :return: 封装好的全对应表 (该字典是加密后的) {user_level: {name: password, ...}, ...}
     """
+    # 封装
+    names_and_passwords = {}
+    for user_level in USER_LEVELS:
+        names_and_passwords[user_level] = dict(get_credential_index(user_level))
 
-    def sheet_to_dict(path: str) -> dict[str, str] | None:
-        """
-        自动解析Excel文件提取姓名-密码映射字典
-        :param path: Excel文件路径
-        :return: {姓名: 密码}的字典，无有效数据时返回空字典
-        """
-        # 初始化返回字典
-        name_pwd_dict: dict[str, str] = {}
+    return names_and_passwords
 
-        # 加载Excel文件
-        try:
-            wb = load_workbook(path, data_only=True)
-            sheet = wb.active
-        except FileNotFoundError:
+
+def compact_credential_workbooks(user_levels: list[str] = None) -> None:
+    """
+    压缩旧格式的账号Excel文件：删除被清空后留下的空白列
+    读取路径不会再写文件，只在手动执行维护命令时调用
+    :param user_levels: 需要压缩的等级列表，默认全部
+    """
+    for user_level in user_levels or USER_LEVELS:
+        path = credential_path(user_level)
+        if not os.path.exists(path):
             warnings.warn(f"Excel文件不存在：{path}")
-            return name_pwd_dict
-        except Exception as e:
-            warnings.warn(f"加载Excel文件失败：{str(e)}")
-            return name_pwd_dict
+            continue
+        remove_empty_columns(path)
 
-        try:
-            # 读取前两行数据（核心：第一行姓名，第二行密码，同列配对）
-            max_col = sheet.max_column  # 获取最大列数
-            for col in range(1, max_col + 1):
-                # 读取当前列的姓名（第一行）和密码（第二行）
-                name_cell = sheet.cell(row=1, column=col)
-                pwd_cell = sheet.cell(row=2, column=col)
-                name_val = name_cell.value
-                pwd_val = pwd_cell.value
 
-                # 处理非空数据
-                if name_val is not None:
-                    name_str = str(name_val).strip()
-                    if name_str:  # 姓名非空才处理
-                        pwd_str = str(pwd_val).strip() if pwd_val is not None else ""
-                        name_pwd_dict[name_str] = pwd_str
+_account_store: AccountStore | None = None
+_account_store_lock = threading.Lock()
+
+
+def get_account_store() -> AccountStore:
+    """
+    获取进程内共享的账号库，第一次使用且账号库为空时自动从旧的Excel文件导入
+    :return: AccountStore
+    """
+    global _account_store
+    with _account_store_lock:
+        if _account_store is None:
+            store = AccountStore()
+            if store.count() == 0:
+                import_accounts_from_xlsx(store)
+            _account_store = store
+        return _account_store
 
-            #   若前两行无数据，尝试读取单列多行（A1=姓名，A2=密码，A3=姓名2，A4=密码2...）
-            if not name_pwd_dict:
-                max_row = sheet.max_row
-                row = 1
-                while row <= max_row:
-                    name_cell = sheet.cell(row=row, column=1)
-                    pwd_cell = sheet.cell(row=row + 1, column=1) if row + 1 <= max_row else None
-                    name_val = name_cell.value
-                    pwd_val = pwd_cell.value if pwd_cell is not None else None
-
-                    if name_val is not None:
-                        name_str = str(name_val).strip()
-                        if name_str:
-                            pwd_str = str(pwd_val).strip() if pwd_val is not None else ""
-                            name_pwd_dict[name_str] = pwd_str
-
-                    row += 2  # 步长2，按行配对姓名和密码
+
+# 明文姓名反向索引：{user_level: {明文姓名: 加密姓名}}，由 add_*/delete_* 维护
+# 账号库文件（含 -wal）的 mtime/大小变化（其他进程写入）时整体作废重建
+_name_index: dict[str, dict[str, str]] = {}
+_name_index_stamp: tuple | None = None
+_name_index_lock = threading.Lock()
+# 有改动、还没导出到Excel的等级
+_dirty_export_levels: set[str] = set()
+# 定时导出Excel的间隔（毫秒）
+ACCOUNT_EXPORT_INTERVAL_MS = 5 * 60 * 1000
+
+
+def _account_store_stamp(store: AccountStore) -> tuple:
+    return _file_stamp(store.sql.db_file), _file_stamp(store.sql.db_file + "-wal")
+
+
+def get_account_name_index(user_level: str) -> dict[str, str]:
+    """
+    获取某一等级的明文姓名反向索引，删除账号时不再需要解密全部账号
+    :param user_level: "Admin" / "Grader" / "Teacher"
+    :return: 缓存的 {明文姓名: 加密姓名}，调用方不要修改它
+    """
+    global _name_index_stamp
+    store = get_account_store()
+    with _name_index_lock:
+        stamp = _account_store_stamp(store)
+        if stamp != _name_index_stamp:
+            _name_index.clear()
+            _name_index_stamp = stamp
+        if user_level not in _name_index:
+            enc_names = list(store.get_all(user_level))
+            plain_names = shared_encryptor.decrypt_many(enc_names, strict=False)
+            _name_index[user_level] = {plain: enc for plain, enc in zip(plain_names, enc_names) if plain is not None}
+        return _name_index[user_level]
+
+
+def _account_changed(user_level: str, name: str, enc_name: str | None) -> None:
+    """
+    本进程写入账号库后同步反向索引，并记录新的文件状态，避免把自己的写入当成外部修改；
+    同时把该等级标记为待导出，由 flush_account_exports 批量写回Excel
+    :param enc_name: 新的加密姓名，None 表示该账号已删除
+    """
+    global _name_index_stamp
+    store = get_account_store()
+    with _name_index_lock:
+        _dirty_export_levels.add(user_level)
+        if user_level in _name_index:
+            if enc_name is None:
+                _name_index[user_level].pop(name, None)
+            else:
+                _name_index[user_level][name] = enc_name
+        _name_index_stamp = _account_store_stamp(store)
+
+
+def import_accounts_from_xlsx(store: AccountStore = None) -> int:
+    """
+    把旧的 data/*_names_and_passwords.xlsx 导入账号库（已存在的账号会被覆盖密码），
+    所有等级在一个事务中写入，只提交一次
+    :param store: 目标账号库，默认是共享账号库
+    :return: 导入的账号数
+    """
+    store = store or get_account_store()
+    imported = 0
+    with store.sql.transaction():
+        for user_level in USER_LEVELS:
+            accounts = list(get_credential_index(user_level).items())
+            store.add_many(user_level, accounts)
+            imported += len(accounts)
+    print(f"<$> 已从Excel导入 {imported} 个账号")
+    return imported
+
+
+def export_accounts_to_xlsx(user_levels: list[str] = None) -> None:
+    """
+    把账号库导出为旧格式的Excel文件（第一行姓名，第二行密码，同列配对），Excel只作为导出格式
+    :param user_levels: 需要导出的等级列表，默认全部
+    """
+    store = get_account_store()
+    for user_level in user_levels or USER_LEVELS:
+        wb = Workbook()
+        sheet = wb.active
+        for col, (enc_name, enc_password) in enumerate(store.get_all(user_level).items(), start=1):
+            sheet.cell(row=1, column=col).value = enc_name
+            sheet.cell(row=2, column=col).value = enc_password
+        wb.save(credential_path(user_level))
+        print(f"<$> 已导出{user_level}账号至{credential_path(user_level)}")
+
+
+def flush_account_exports() -> bool:
+    """
+    把本进程改动过的等级一次性导出到Excel，每个文件只保存一次；没有改动时不写文件
+    在定时器、窗口关闭或需要最新Excel时调用
+    导出失败（如文件正在被 Excel 打开）的等级会保留改动标记并发出警告，下次再导出
+    :return: 是否全部导出成功
+    """
+    with _name_index_lock:
+        levels = [level for level in USER_LEVELS if level in _dirty_export_levels]
+        _dirty_export_levels.difference_update(levels)
+    ok = True
+    for level in levels:
+        try:
+            export_accounts_to_xlsx([level])
         except Exception as e:
-            warnings.warn(f"解析Excel数据失败：{e}")
+            ok = False
+            with _name_index_lock:
+                _dirty_export_levels.add(level)
+            warnings.warn(f"导出{level}账号到 {credential_path(level)} 失败，稍后重试：{e}")
+    return ok
+
+
+def schedule_account_exports(root, interval_ms: int = ACCOUNT_EXPORT_INTERVAL_MS) -> None:
+    """
+    在 Tk 主循环中定时调用 flush_account_exports
+    :param root: tk 根窗口
+    :param interval_ms: 间隔（毫秒）
+    """
+    def tick():
+        try:
+            flush_account_exports()
         finally:
-            wb.close()  # 确保关闭工作簿
-            return name_pwd_dict
-    # 封装
-    user_levels: list[str] = ["Admin", "Grader", "Teacher"]
-    names_and_passwords = {}
-    for user_level in user_levels:
-        sheets: dict[str, str] = sheet_to_dict(f"data/{user_level}_names_and_passwords.xlsx")
-
-        temp_names_and_passwords = {}
-        for key in sheets:
-            index_name = key
-            temp_names_and_passwords[index_name] = sheets[index_name]
-        names_and_passwords[user_level] = temp_names_and_passwords
-    remove_empty_columns("data/Admin_names_and_passwords.xlsx")
-    remove_empty_columns("data/Grader_names_and_passwords.xlsx")
-    remove_empty_columns("data/Teacher_names_and_passwords.xlsx")
+            root.after(interval_ms, tick)  # 即使导出出错也继续定时
 
-    return names_and_passwords
+    root.after(interval_ms, tick)
+
+
+# 名单表头（中英文均可）→ 字段名
+ROSTER_COLUMNS: dict[str, str] = {
+    "name": "name", "姓名": "name",
+    "password": "password", "密码": "password",
+    "grade": "grade", "年级": "grade",
+    "type": "type", "类别": "type",
+    "m_number": "m_number", "班级数": "m_number",
+}
+
+
+def _check_roster_setting(record: dict) -> str | None:
+    """
+    检查名单一行的班级设置，合法时把班级数转换为整数
+    :param record: read_roster 解析出的一行
+    :return: 错误说明，合法（或没有填写班级设置）时返回 None
+    """
+    grade, m_number = record.get("grade", ""), record.get("m_number", "")
+    if not grade and not m_number:
+        return None
+    if not grade or not m_number:
+        return "年级和班级数需要同时填写"
+    try:
+        number = float(m_number)
+    except ValueError:
+        number = 0.0
+    if not number.is_integer() or number <= 0:
+        return f"班级数必须是正整数：{m_number}"
+    record["m_number"] = int(number)
+    return None
+
+
+def read_roster(path: str):
+    """
+    逐行读取名单文件（.csv 或 .xlsx），第一行是表头，至少包含 姓名/name 和 密码/password 两列
+    可选列 年级/grade、类别/type、班级数/m_number 对应 set_m_classes 保存的班级设置
+    :param path: 名单文件路径
+    :return: 生成器，每行一个 {字段名: 值} 字典，"row" 为该行在文件中的行号；
+             姓名为空的行会被跳过，班级设置不完整或班级数不是正整数的行会给出警告（带行号）并跳过
+    """
+    def normalize(rows):
+        header = None
+        for row_number, row in enumerate(rows, start=1):
+            values = ["" if v is None else str(v).strip() for v in row]
+            if header is None:
+                header = [ROSTER_COLUMNS.get(v, ROSTER_COLUMNS.get(v.lower())) for v in values]
+                if "name" not in header or "password" not in header:
+                    raise ValueError(f"名单表头必须包含 姓名/name 和 密码/password：{values}")
+                continue
+            record = {key: value for key, value in zip(header, values) if key}
+            if not record.get("name"):
+                continue
+            error = _check_roster_setting(record)
+            if error:
+                warnings.warn(f"名单第 {row_number} 行（{record['name']}）已跳过：{error}")
+                continue
+            record["row"] = row_number
+            yield record
+
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from normalize(csv.reader(f))
+    elif path.lower().endswith(".xlsx"):
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from normalize(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    else:
+        raise ValueError(f"不支持的名单格式：{path}（只支持 .csv / .xlsx）")
 
 
-def get_time():
-    # date to dict{"year":2025,"month": 12, "day": 13, "hour": "15", ...}
-    time = datetime.datetime.now().strftime('{"y":"%Y", "m":"%m", "d":"%d", "h":"%H", "M":"%M", "s":"%S"}')
-    return str_to_dict(time)
+def import_roster(path: str, user_level: str = "Grader") -> int:
+    """
+    从名单文件批量创建账号：所有姓名和密码一次批量加密，账号在一个事务中写入账号库，
+    打分员的班级设置（年级/类别/班级数）在同一个事务中写入打分员设置库
+    :param path: 名单文件路径（.csv 或 .xlsx）
+    :param user_level: "Grader" 或 "Teacher"
+    :return: 写入的账号数
+    """
+    if user_level not in ("Grader", "Teacher"):
+        raise ValueError(f"只能批量导入打分员或教师账号：{user_level}")
+
+    accounts: dict[str, str] = {}  # {姓名: 密码}，同名的行以最后一行为准
+    settings: dict[str, dict[str, str]] = {}
+    for record in read_roster(path):
+        if not record.get("password"):
+            warnings.warn(f"名单第 {record['row']} 行（{record['name']}）没有密码，已跳过")
+            continue
+        if record["name"] in accounts:
+            warnings.warn(f"名单第 {record['row']} 行的 {record['name']} 与前面的行重复，以这一行为准")
+        accounts[record["name"]] = record["password"]
+        if user_level == "Grader" and record.get("grade") and record.get("m_number"):
+            settings[record["name"]] = {"grade": record["grade"],
+                                        "type": record.get("type", ""),
+                                        "m_number": record["m_number"]}
+    if not accounts:
+        print("<$> 名单中没有可导入的账号")
+        return 0
+    names, passwords = list(accounts), list(accounts.values())
+
+    encrypted = shared_encryptor.encrypt_many(names + passwords)
+    enc_names, enc_passwords = encrypted[:len(names)], encrypted[len(names):]
+    store = get_account_store()
+    assignments = get_assignment_store()  # 在事务外创建：第一次创建时会从 config.json 导入
+    with store.sql.transaction():
+        written = store.add_many(user_level, list(zip(enc_names, enc_passwords)))
+        if written and settings:
+            assignments.set_many(settings)
+    if not written:
+        return 0
+    for name, enc_name in zip(names, enc_names):
+        _account_changed(user_level, name, enc_name)
+
+    print(f"<$> 已从名单导入 {len(names)} 个{user_level}账号，其中 {len(settings)} 个带班级设置")
+    return len(names)
 
 
 class FixedIVEncryptor:
@@ -144,16 +448,79 @@ class FixedIVEncryptor:
 
     def __init__(self,
                  key: str = """public static void main(String []args){ System.out.print("Hi python,I'm java.")}""",
-                 fixed_iv: str = "public_pilot_oil"):
+                 fixed_iv: str = "public_pilot_oil",
+                 cache_size: int = 4096):
         """
         初始化加密器（固定IV保证相同明文输出相同密文）
         :param key: 加密密钥（任意长度，内部自动处理为32位（AES-256））
         :param fixed_iv: 固定初始向量（必须16位字符，默认值可自定义）
+        :param cache_size: 明文/密文对 LRU 缓存的最大条数（0 表示不缓存）
         """
         self.key = key.encode('utf-8')[:32].ljust(32, b'\0')
         if len(fixed_iv) != 16:
             raise ValueError("固定IV必须是16位字符（中文/英文/数字均可）")
         self.iv = fixed_iv.encode('utf-8')[:16].ljust(16, b'\0')
+        # 复用同一个分组密码对象，CBC 的链接（与上一块异或）在下面手动完成，结果与 AES.MODE_CBC 完全一致
+        self._ecb = AES.new(self.key, AES.MODE_ECB)
+        # 固定IV下加密是确定的，明文和密文一一对应，可以双向缓存
+        self._cache_size = cache_size
+        self._plain_to_cipher: OrderedDict[str, str] = OrderedDict()
+        self._cipher_to_plain: OrderedDict[str, str] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, cache: OrderedDict, key: str) -> str | None:
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, plaintext: str, ciphertext: str) -> None:
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            for cache, key, value in ((self._plain_to_cipher, plaintext, ciphertext),
+                                      (self._cipher_to_plain, ciphertext, plaintext)):
+                cache[key] = value
+                cache.move_to_end(key)
+                while len(cache) > self._cache_size:
+                    cache.popitem(last=False)
+
+    def _cbc_encrypt_many(self, blobs: list[bytes]) -> list[bytes]:
+        """
+        批量 CBC 加密：各条消息互相独立，第 n 轮把所有消息的第 n 块拼在一起做一次分组加密
+        """
+        padded = [pad(b, AES.block_size, style='pkcs7') for b in blobs]
+        outputs = [bytearray() for _ in padded]
+        previous = [self.iv] * len(padded)
+        offset = 0
+        while True:
+            active = [i for i, p in enumerate(padded) if len(p) > offset]
+            if not active:
+                break
+            chunk = b"".join(strxor(padded[i][offset:offset + AES.block_size], previous[i]) for i in active)
+            encrypted = self._ecb.encrypt(chunk)
+            for n, i in enumerate(active):
+                block = encrypted[n * AES.block_size:(n + 1) * AES.block_size]
+                outputs[i] += block
+                previous[i] = block
+            offset += AES.block_size
+        return [bytes(o) for o in outputs]
+
+    def _cbc_decrypt_many(self, blobs: list[bytes]) -> list[bytes]:
+        """
+        批量 CBC 解密：所有密文拼接后只做一次分组解密，再与"上一块密文"（每条消息开头是IV）整体异或
+        """
+        if not blobs:
+            return []
+        decrypted = self._ecb.decrypt(b"".join(blobs))
+        chained = strxor(decrypted, b"".join(self.iv + b[:-AES.block_size] for b in blobs))
+        results = []
+        offset = 0
+        for b in blobs:
+            results.append(chained[offset:offset + len(b)])
+            offset += len(b)
+        return results
 
     def encrypt(self, plaintext: str) -> str:
         """
@@ -161,17 +528,7 @@ class FixedIVEncryptor:
         :param plaintext: 明文（待加密字符串）
         :return: Base64编码的密文字符串（无随机成分）
         """
-        try:
-            plain_bytes = plaintext.encode('utf-8')
-            padded_plain = pad(plain_bytes, AES.block_size, style='pkcs7')
-
-            cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
-            cipher_bytes = cipher.encrypt(padded_plain)
-
-            encrypted = base64.b64encode(cipher_bytes).decode('utf-8')
-            return encrypted
-        except Exception as e:
-            raise ValueError(f"加密失败：{str(e)}")
+        return self.encrypt_many([plaintext])[0]
 
     def decrypt(self, ciphertext: str) -> str:
         """
@@ -179,16 +536,64 @@ class FixedIVEncryptor:
         :param ciphertext: 加密返回的Base64密文字符串
         :return: 还原后的明文（中/英/数字混合）
         """
+        return self.decrypt_many([ciphertext])[0]
+
+    def encrypt_many(self, plaintexts: list[str]) -> list[str]:
+        """
+        批量加密，一次处理整个列表，已缓存的明文直接返回
+        :param plaintexts: 明文列表
+        :return: 与输入一一对应的Base64密文列表
+        """
         try:
-            # Base64解码 → AES-CBC解密 → 去除补位 → 转回UTF-8字符串
-            cipher_bytes = base64.b64decode(ciphertext)
-            cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
-            decrypted_padded = cipher.decrypt(cipher_bytes)
-            decrypted_bytes = unpad(decrypted_padded, AES.block_size, style='pkcs7')
-            plaintext = decrypted_bytes.decode('utf-8')
-            return plaintext
+            results: list[str | None] = [self._cache_get(self._plain_to_cipher, p) for p in plaintexts]
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                encrypted = self._cbc_encrypt_many([plaintexts[i].encode('utf-8') for i in missing])
+                for i, cipher_bytes in zip(missing, encrypted):
+                    results[i] = base64.b64encode(cipher_bytes).decode('utf-8')
+                    self._cache_put(plaintexts[i], results[i])
+            return results
         except Exception as e:
-            raise ValueError(f"解密失败：{str(e)}（请检查密钥/IV/密文是否正确）")
+            raise ValueError(f"加密失败：{str(e)}")
+
+    def decrypt_many(self, ciphertexts: list[str], strict: bool = True) -> list[str | None]:
+        """
+        批量解密，一次处理整个列表，已缓存的密文直接返回
+        :param ciphertexts: Base64密文列表
+        :param strict: True 时遇到无法解密的密文抛出 ValueError；False 时该位置返回 None
+        :return: 与输入一一对应的明文列表
+        """
+        results: list[str | None] = [self._cache_get(self._cipher_to_plain, c) for c in ciphertexts]
+        missing = []
+        blobs = []
+        for i, r in enumerate(results):
+            if r is not None:
+                continue
+            try:
+                cipher_bytes = base64.b64decode(ciphertexts[i])
+                if not cipher_bytes or len(cipher_bytes) % AES.block_size:
+                    raise ValueError("密文长度不是分组长度的整数倍")
+            except Exception as e:
+                if strict:
+                    raise ValueError(f"解密失败：{str(e)}（请检查密钥/IV/密文是否正确）")
+                continue
+            missing.append(i)
+            blobs.append(cipher_bytes)
+
+        for i, decrypted_padded in zip(missing, self._cbc_decrypt_many(blobs)):
+            try:
+                plaintext = unpad(decrypted_padded, AES.block_size, style='pkcs7').decode('utf-8')
+            except Exception as e:
+                if strict:
+                    raise ValueError(f"解密失败：{str(e)}（请检查密钥/IV/密文是否正确）")
+                continue
+            results[i] = plaintext
+            self._cache_put(plaintext, ciphertexts[i])
+        return results
+
+
+# 进程内共享的加密器，避免每次调用都重新创建
+shared_encryptor = FixedIVEncryptor()
 
 
 class User:
@@ -270,28 +675,6 @@ class User:
         return result[0] if result[0] is not None else ""
 
     def set_m_classes(self, root, grader_name: str) -> None:
-        import json
-        import os
-
-        def read_config(file_path='config.json'):
-            """
-            读取 config.json 配置文件并返回其内容。
-
-            参数:
-                file_path (str): 配置文件路径，默认为 'config.json'
-
-            返回:
-                dict: JSON 文件解析后的 Python 字典
-
-            异常:
-                FileNotFoundError: 如果文件不存在
-                json.JSONDecodeError: 如果文件内容不是合法的 JSON
-            """
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"配置文件 '{file_path}' 不存在。")
-
-            with open(file_path, 'r', encoding='utf-8') as __f:
-                return json.load(__f)
         """
             {
                 "u_name1" : 
@@ -307,44 +690,18 @@ class User:
             }
         """
         u_name = grader_name
-        info: dict[str, dict[str, str]] = read_config()
-        print(info)
+        store = get_assignment_store()
+        print(store.get(u_name))
         grade = self.__get_input(f"请输入{u_name}所需要管理的年级", root)
         m_type = self.__get_input(f"请输入{u_name}管理的类别", root)
         m_number = self.__get_input(f"请输入{grade}有多少个班级", root)
-        if u_name in info:
-            info[u_name]["grade"] = grade
-            info[u_name]["type"] = m_type
-            info[u_name]["m_number"] = m_number
-        else:
-            info[u_name] = {"grade": grade, "type": m_type, "m_number": m_number}
-        with open('config.json', 'w', encoding='utf-8') as _f:
-            json.dump(info, _f, ensure_ascii=False, indent=4)
+        if not m_number.strip().isdigit():
+            MessageDialog(root, f"班级数必须是整数：{m_number}")
+            return
+        with store.sql.transaction():
+            store.set(u_name, grade, m_type, m_number)
     @staticmethod
     def get_m_classes(user_name: str, root):
-        import json
-        import os
-
-        def read_config(file_path='config.json'):
-            """
-            读取 config.json 配置文件并返回其内容。
-
-            参数:
-                file_path (str): 配置文件路径，默认为 'config.json'
-
-            返回:
-                dict: JSON 文件解析后的 Python 字典
-
-            异常:
-                FileNotFoundError: 如果文件不存在
-                json.JSONDecodeError: 如果文件内容不是合法的 JSON
-            """
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"配置文件 '{file_path}' 不存在。")
-
-            with open(file_path, 'r', encoding='utf-8') as __f:
-                return json.load(__f)
-
         """
             {
                 "u_name1" : 
@@ -360,18 +717,11 @@ class User:
             }
         """
         u_name = user_name
-        info: dict[str, dict[str, str]] = read_config()
-        try:
-            def spawn_class(grade: int = 1, max_class: int = 6) -> list:
-                results = []
-                for i in range(max_class):
-                    results.append(f"{grade}0{i + 1}")
-                return results
-            s: str = str(spawn_class(int(info[u_name]["grade"]), int(info[u_name]["m_number"])))
-            res = s.replace("[", "").replace("]", "").replace("'", "")
-            MessageDialog(root, res)
-        except IndexError as e:
-            warnings.warn(str(e))
+        grader = get_grader_setting(u_name)
+        if grader is None:
+            MessageDialog(root, f"{u_name} 还没有设置管理的班级")
+            return
+        MessageDialog(root, ", ".join(grader.classes))
 
 
 
@@ -382,21 +732,13 @@ class User:
         :return: str
         """
 
-        user_levels: list[str] = ["Admin", "Grader", "Teacher"]
-        encryptor = FixedIVEncryptor()  # 加密器
+        encrypted_name, encrypted_password = shared_encryptor.encrypt_many([self.login_name, self.password])
 
-        for user_level in user_levels:
-            """
-                index_levels 是一个列表，不是变量或字典！！！
-            """
-            index_level: dict[str, str] = get_users_and_passwords()[
-                user_level]  # 他返回的是字典，格式：{user_name: password, user_name: password, ...}
-            encrypted_name = encryptor.encrypt(self.login_name)
-            encrypted_password = encryptor.encrypt(self.password)
-            if encrypted_name in index_level:
-                if encrypted_password == index_level[encrypted_name]:
-                    temp = user_level
-                    self.__level = temp
+        store = get_account_store()
+        for user_level in USER_LEVELS:
+            # 账号库在 (level, enc_name) 上有唯一索引，一次索引查找
+            if store.get_password(user_level, encrypted_name) == encrypted_password:
+                self.__level = user_level
         return self.__level
 
     @login_level.setter
@@ -411,13 +753,9 @@ class User:
         name = self.__get_input("请输入要添加的管理员的姓名", root)
         password = self.__get_input("请输入该账号的密码", root)
         if self.login_level == "Admin":  # 验证用户等级
-            wb = load_workbook("data/Admin_names_and_passwords.xlsx")
-            sheet = wb.active
-            encryptor = FixedIVEncryptor()
-            admin_num = len(get_users_and_passwords()["Admin"])
-            sheet[f"{get_column_letter(admin_num + 1)}1"] = encryptor.encrypt(name)
-            sheet[f"{get_column_letter(admin_num + 1)}2"] = encryptor.encrypt(password)
-            wb.save("data/Admin_names_and_passwords.xlsx")
+            enc_name, enc_password = shared_encryptor.encrypt_many([name, password])
+            get_account_store().add("Admin", enc_name, enc_password)
+            _account_changed("Admin", name, enc_name)
 
     def add_grader(self, root):
         """
@@ -425,15 +763,11 @@ class User:
         :return: 无
         """
         if self.login_level == "Admin" or self.login_level == "Teacher":  # 验证用户等级
-            wb = load_workbook("data/Grader_names_and_passwords.xlsx")
-            sheet = wb.active
-            encryptor = FixedIVEncryptor()
-            admin_num = len(self.get_user_names("Grader"))
             name = self.__get_input("请输入要添加的打分员姓名", root)
             password = self.__get_input(f"请输入{name}的密码", root)
-            sheet[f"{get_column_letter(admin_num + 1)}1"] = encryptor.encrypt(name)
-            sheet[f"{get_column_letter(admin_num + 1)}2"] = encryptor.encrypt(password)
-            wb.save("data/Grader_names_and_passwords.xlsx")
+            enc_name, enc_password = shared_encryptor.encrypt_many([name, password])
+            get_account_store().add("Grader", enc_name, enc_password)
+            _account_changed("Grader", name, enc_name)
 
     def add_teacher(self, name, password):
         """
@@ -443,13 +777,28 @@ class User:
                 :return: 无
                 """
         if self.login_level == "Admin":  # 验证用户等级
-            wb = load_workbook("data/Teacher_names_and_passwords.xlsx")
-            sheet = wb.active
-            encryptor = FixedIVEncryptor()
-            admin_num = len(get_users_and_passwords()["Teacher"])
-            sheet[f"{get_column_letter(admin_num + 1)}1"] = encryptor.encrypt(name)
-            sheet[f"{get_column_letter(admin_num + 1)}2"] = encryptor.encrypt(password)
-            wb.save("data/Teacher_names_and_passwords.xlsx")
+            enc_name, enc_password = shared_encryptor.encrypt_many([name, password])
+            get_account_store().add("Teacher", enc_name, enc_password)
+            _account_changed("Teacher", name, enc_name)
+
+    def import_roster(self, root, user_level: str = "Grader"):
+        """
+        选择名单文件并批量创建账号（管理员可导入打分员和教师，教师只能导入打分员）
+        :param root: 父窗口
+        :param user_level: "Grader" 或 "Teacher"
+        :return: 无
+        """
+        if self.login_level == "Admin" or (self.login_level == "Teacher" and user_level == "Grader"):
+            from tkinter import filedialog
+            path = filedialog.askopenfilename(parent=root, title="选择名单文件",
+                                              filetypes=[("名单", "*.csv *.xlsx"), ("所有文件", "*.*")])
+            if not path:
+                return
+            try:
+                count = import_roster(path, user_level)
+                MessageDialog(root, f"成功导入 {count} 个账号")
+            except (ValueError, OSError, sqlite3.Error) as e:
+                MessageDialog(root, f"导入失败：{e}")
 
     def delete_admin(self, name: str):
         if self.login_level != "Admin":
@@ -457,49 +806,17 @@ class User:
             return
 
         try:
-            # 1. 获取原始的加密字典（密文用户名 -> 密文密码）
-            encrypted_dict = get_users_and_passwords()["Admin"]  # 假设这就是 {enc_user: enc_pwd}
-
-            # 2. 创建解密映射：{明文用户名: (密文用户名, 密文密码)}
-            encryptor = FixedIVEncryptor()
-            plaintext_to_encrypted = {}
-
-            for enc_user, enc_pwd in encrypted_dict.items():
-                try:
-                    plain_user = encryptor.decrypt(enc_user)
-                    # plain_pwd = encryptor.decrypt(enc_pwd)  # 暂时不需要密码
-                    plaintext_to_encrypted[plain_user] = enc_user  # 只需密文用户名用于定位
-                except IndexError as e:
-                    print(e)
-                    continue  # 跳过无效条目
-            # 3. 如果目标用户不在其中
-            if name not in plaintext_to_encrypted:
+            # 1. 从明文姓名反向索引中直接找到密文用户名
+            target_enc_user = get_account_name_index("Admin").get(name)
+            if target_enc_user is None:
                 print(f"⚠️ 用户 '{name}' 不存在")
                 return
 
-            # 4. 找到对应的密文用户名
-            target_enc_user = plaintext_to_encrypted[name]
-
-            # 5. 加载 Excel 文件，查找哪一列的 A1、B1... 等于 target_enc_user
-            wb = load_workbook("data/Admin_names_and_passwords.xlsx")
-            ws = wb.active
-
-            found_col = None
-            for col_idx in range(1, ws.max_column + 1):
-                cell_value = ws.cell(row=1, column=col_idx).value
-                if cell_value == target_enc_user:
-                    found_col = col_idx
-                    break
-
-            if found_col is None:
-                print("❌ 数据不一致：密文用户名未在 Excel 中找到")
+            # 2. 从账号库中删除该账号
+            if not get_account_store().delete("Admin", target_enc_user):
+                print("❌ 数据不一致：密文用户名未在账号库中找到")
                 return
-
-            # 6. 清空该列
-            ws.cell(row=1, column=found_col).value = None
-            ws.cell(row=2, column=found_col).value = None
-
-            wb.save("data/Admin_names_and_passwords.xlsx")
+            _account_changed("Admin", name, None)
             print(f"✅ 成功删除管理员: {name}")
 
         except Exception as e:
@@ -513,74 +830,21 @@ class User:
             return
 
         try:
-            import json
-            import os
-
-            def read_config(file_path='config.json'):
-                """
-                读取 config.json 配置文件并返回其内容。
-
-                参数:
-                    file_path (str): 配置文件路径，默认为 'config.json'
-
-                返回:
-                    dict: JSON 文件解析后的 Python 字典
-
-                异常:
-                    FileNotFoundError: 如果文件不存在
-                    json.JSONDecodeError: 如果文件内容不是合法的 JSON
-                """
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"配置文件 '{file_path}' 不存在。")
-
-                with open(file_path, 'r', encoding='utf-8') as __f:
-                    return json.load(__f)
-            # 1. 获取原始的加密字典（密文用户名 -> 密文密码）
-            encrypted_dict = get_users_and_passwords()["Grader"]
-            encryptor = FixedIVEncryptor()
-            plaintext_to_encrypted = {}
-
-            for enc_user in encrypted_dict:
-                try:
-                    print(f"[DEBUG] 尝试解密: {repr(enc_user)}")
-                    plain_user = encryptor.decrypt(enc_user)
-                    plaintext_to_encrypted[plain_user] = enc_user  # 只需密文用户名用于定位
-                except IndexError as e:
-                    print(e)
-                    continue  # 跳过无效条目
-            # 3. 如果目标用户不在其中
-            if name not in plaintext_to_encrypted:
+            # 1. 从明文姓名反向索引中直接找到密文用户名
+            target_enc_user = get_account_name_index("Grader").get(name)
+            if target_enc_user is None:
                 print(f"⚠️ 用户 '{name}' 不存在")
                 return
 
-            # 4. 找到对应的密文用户名
-            target_enc_user = plaintext_to_encrypted[name]
-
-            # 5. 加载 Excel 文件，查找哪一列的 A1、B1... 等于 target_enc_user
-            wb = load_workbook("data/Grader_names_and_passwords.xlsx")
-            ws = wb.active
-
-            found_col = None
-            for col_idx in range(1, ws.max_column + 1):
-                cell_value = ws.cell(row=1, column=col_idx).value
-                if cell_value == target_enc_user:
-                    found_col = col_idx
-                    break
-
-            if found_col is None:
-                print("❌ 数据不一致：密文用户名未在 Excel 中找到")
-                return
-
-            # 6. 清空该列
-            info = read_config()
-
-            del info[name]
-            ws.cell(row=1, column=found_col).value = None
-            ws.cell(row=2, column=found_col).value = None
-
-            wb.save("data/Grader_names_and_passwords.xlsx")
-            with open('config.json', 'w', encoding='utf-8') as _f:
-                json.dump(info, _f, ensure_ascii=False, indent=4)
+            # 2. 在同一个事务里删除该账号和他的班级设置（两张表在同一个数据库文件中）
+            store = get_account_store()
+            assignments = get_assignment_store()  # 在事务外创建：第一次创建时会从 config.json 导入
+            with store.sql.transaction():
+                if not store.delete("Grader", target_enc_user):
+                    print("❌ 数据不一致：密文用户名未在账号库中找到")
+                    return
+                assignments.delete(name)
+            _account_changed("Grader", name, None)
             print(f"✅ 成功删除打分员: {name}")
 
         except Exception as e:
@@ -594,49 +858,17 @@ class User:
             return
 
         try:
-            # 1. 获取原始的加密字典（密文用户名 -> 密文密码）
-            encrypted_dict = get_users_and_passwords()["Teacher"]  # 假设这就是 {enc_user: enc_pwd}
-
-            # 2. 创建解密映射：{明文用户名: (密文用户名, 密文密码)}
-            encryptor = FixedIVEncryptor()
-            plaintext_to_encrypted = {}
-
-            for enc_user, enc_pwd in encrypted_dict.items():
-                try:
-                    plain_user = encryptor.decrypt(enc_user)
-                    # plain_pwd = encryptor.decrypt(enc_pwd)  # 暂时不需要密码
-                    plaintext_to_encrypted[plain_user] = enc_user  # 只需密文用户名用于定位
-                except IndexError as e:
-                    print(e)
-                    continue  # 跳过无效条目
-            # 3. 如果目标用户不在其中
-            if name not in plaintext_to_encrypted:
+            # 1. 从明文姓名反向索引中直接找到密文用户名
+            target_enc_user = get_account_name_index("Teacher").get(name)
+            if target_enc_user is None:
                 print(f"⚠️ 用户 '{name}' 不存在")
                 return
 
-            # 4. 找到对应的密文用户名
-            target_enc_user = plaintext_to_encrypted[name]
-
-            # 5. 加载 Excel 文件，查找哪一列的 A1、B1... 等于 target_enc_user
-            wb = load_workbook("data/Teacher_names_and_passwords.xlsx")
-            ws = wb.active
-
-            found_col = None
-            for col_idx in range(1, ws.max_column + 1):
-                cell_value = ws.cell(row=1, column=col_idx).value
-                if cell_value == target_enc_user:
-                    found_col = col_idx
-                    break
-
-            if found_col is None:
-                print("❌ 数据不一致：密文用户名未在 Excel 中找到")
+            # 2. 从账号库中删除该账号
+            if not get_account_store().delete("Teacher", target_enc_user):
+                print("❌ 数据不一致：密文用户名未在账号库中找到")
                 return
-
-            # 6. 清空该列
-            ws.cell(row=1, column=found_col).value = None
-            ws.cell(row=2, column=found_col).value = None
-
-            wb.save("data/Teacher_names_and_passwords.xlsx")
+            _account_changed("Teacher", name, None)
             print(f"✅ 成功删除教师: {name}")
 
         except Exception as e:
@@ -648,7 +880,7 @@ class User:
     def punch_in(self):
         sql = MyEasySQLite("punch_in.db")
         table = "punch_in"
-        sql.create_table(table, column_names=['name', 'punch_days', 'punch_state'])
+        sql.create_table(table, column_names=['name', 'punch_days', 'punch_state'], indexes=[['name']])
         if sql.get_data(table, {"name": self.login_name}):
             """
                 :param "name": 名字
@@ -674,50 +906,114 @@ class User:
                                                conditions={'name': user_name}))
         return self.__punch_state
 
-    def sql_add_data(self, root):
+    def sql_add_data(self, root, date=None):
+        """
+        :param date: 保存到哪一天 "YYYY-MM-DD"，默认今天
+        """
         if self.login_level != "has no login" and self.login_level != "Teacher":
+            partition = resolve_partition(date)  # 在一连串输入之前确定日期
             leaf: Leaf = Leaf(self.login_name)
             for i in leaf.classes:
-                for j in range(5):
-                    u: str = self.__get_input(f"请输入你要给{i}班添加第{j}天的分数值", root)
-                    leaf.add_data(u)
+                for j in range(SCHOOL_DAYS):
+                    # 按提示的班级和天数填写；输入不合规时重新询问，留空则跳过这一格
+                    prompt = f"请输入你要给{i}班添加第{j + 1}天的分数值"
+                    while True:
+                        u: str = self.__get_input(prompt, root)
+                        if not u.strip() or leaf.set_score(i, j + 1, u):
+                            break
+                        prompt = f"输入不合规：{u}\n请重新输入{i}班第{j + 1}天的分数值（留空跳过）"
             print("保存中......")
             self.__punch_state = True
-            leaf.save()
+            leaf.save(partition.date)
             print("保存完毕")
 
-    def sql_del_data(self, root):
+    @staticmethod
+    def __check_score_cell(class_: str, day: str) -> str | None:
+        """
+        检查输入的班级和第几天
+        :return: 不合规时返回提示，合规时返回 None
+        """
+        if not class_.strip():
+            return "班级不能为空"
+        if not day.strip().isdigit() or not 1 <= int(day) <= SCHOOL_DAYS:
+            return f"第几天必须是 1~{SCHOOL_DAYS} 的整数：{day}"
+        return None
+
+    def sql_del_data(self, root, date=None):
         """
         用于操作sql的删除操作
+        :param date: 要修改哪一天保存的分数 "YYYY-MM-DD"，默认今天
         """
 
         if self.login_level != "has no login" and self.login_level != "Teacher":
+            partition = resolve_partition(date)  # 在等待输入之前确定日期
             c = self.__get_input("你要删除哪个班的分数", root)
             d = self.__get_input("你要删除这个班第几天的分数", root)
-            sql = MyEasySQLite(f"Leaf/{self.login_name}/{get_time()['y']}-{get_time()['m']}.db")
-            con = {"class": c, "day": d}
-            sql.delete_data(f"{get_time()['d']}", con)
+            error = self.__check_score_cell(c, d)
+            if error:
+                MessageDialog(root, error)
+                return
+            store = get_score_store()
+            try:
+                with store.sql.transaction():
+                    deleted = store.delete_scores(self.login_name, partition.date, c.strip(), d.strip())
+            except (ValueError, sqlite3.Error) as e:
+                MessageDialog(root, f"删除失败：{e}")
+                return
+            if not deleted:
+                MessageDialog(root, f"{partition.date} 没有 {c}班第{d}天的分数")
 
-    def sql_update_data(self, root):
+    def sql_update_data(self, root, date=None):
+        """
+        :param date: 要修改哪一天保存的分数 "YYYY-MM-DD"，默认今天
+        """
         if self.login_level != "has no login" and self.login_level != "Teacher":
-            sql = MyEasySQLite(f"Leaf/{self.login_name}/{get_time()['y']}-{get_time()['m']}.db")
+            partition = resolve_partition(date)
             c = self.__get_input("请输入你要替换的班级", root)
             d = self.__get_input("请输入你要替换哪一天的分数", root)
-            data = {"score": self.__get_input("请输入你要替换的分数", root)}
-            con = {"class": c, "day": d}
-            sql.update_data(f"{get_time()['d']}", new_data=data, conditions=con)
+            score = self.__get_input("请输入你要替换的分数", root)
+            error = self.__check_score_cell(c, d)
+            if error is None and Leaf.parse_score(score) is None:
+                error = f"分数必须是数字：{score}"
+            if error:
+                MessageDialog(root, error)
+                return
+            store = get_score_store()
+            try:
+                with store.sql.transaction():
+                    updated = store.update_score(self.login_name, partition.date, c.strip(), d.strip(),
+                                                 Leaf.parse_score(score))
+            except (ValueError, sqlite3.Error) as e:
+                MessageDialog(root, f"修改失败：{e}")
+                return
+            if not updated:
+                MessageDialog(root, f"{partition.date} 没有 {c}班第{d}天的分数")
 
-    def sql_get_table(self) -> list[str]:
+    def sql_get_table(self, date=None) -> list[float]:
+        """
+        :param date: "YYYY-MM-DD"，默认今天
+        """
         result = []
         if self.login_level != "has no login" and self.login_level != "Teacher":
-            sql = MyEasySQLite(f"Leaf/{self.login_name}/{get_time()['y']}-{get_time()['m']}.db")
-            t = sql.get_data(f"{get_time()['d']}")
-            tmp: dict[str, str] = t[0]
-            for k, v in tmp.items():
-                if k == "score":
-                    result.append(v)
+            # 只需要当天第一行的 score
+            for _class, _weekday, score in get_score_store().get_scores(self.login_name, resolve_partition(date).date,
+                                                                         limit=1):
+                result.append(score)
         return result
 
+    def sql_get_history(self, start: str, end: str) -> list[tuple]:
+        """
+        查询自己在 [start, end] 的全部分数，旧的 Leaf 月数据库和分数库一起查
+        :param start: 起始日期 "YYYY-MM-DD"
+        :param end: 结束日期 "YYYY-MM-DD"
+        :return: [(日期, 班级, 第几天, 分数), ...]
+        :raises ValueError: 日期格式不对，或 start 晚于 end
+        """
+        if self.login_level == "has no login" or self.login_level == "Teacher":
+            return []
+        with LeafHistory(self.login_name, include_store=True) as history:
+            return history.open_range(start, end).scores()
+
     ####################test#############
     @staticmethod
     def get_user_names(__level: str) -> list[str]:
@@ -725,17 +1021,5 @@ class User:
         获取所有账号的明文姓名列表。
         :return: 姓名列表，如 ["张三", "李四"]
         """
-        encryptor = FixedIVEncryptor()
-        all_users = get_users_and_passwords()
-        admin_encrypted_dict = all_users.get(f"{__level}", {})
-
-        admin_names = []
-        for encrypted_name in admin_encrypted_dict.keys():
-            try:
-                plain_name = encryptor.decrypt(encrypted_name)
-                admin_names.append(plain_name)
-            except ValueError as e:
-                # 可选：记录日志或跳过损坏条目
-                print(e)
-                continue
-        return admin_names
\ No newline at end of file
+        # 反向索引按账号添加顺序保存明文姓名，只有账号库被外部修改时才重新批量解密
+        return list(get_account_name_index(f"{__level}"))
\ No newline at end of file